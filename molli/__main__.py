@@ -1,6 +1,10 @@
 import molli as ml
 from importlib import import_module
-from sys import argv, stderr
+from sys import argv, stderr, stdout
+import logging
+
+# the command line is an application: workflow messages are shown as plain lines on stdout
+logging.basicConfig(level=logging.INFO, format="%(message)s", stream=stdout)
 
 
 print("MOLLI", ml.__version__)
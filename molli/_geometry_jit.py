@@ -0,0 +1,47 @@
+"""
+    Hot geometry primitives (distances, angles between points of a coordinate array)
+"""
+import math
+import numpy as np
+
+from ._jit import njit, HAS_NUMBA
+
+
+def _point_distance(coord, i, j):
+    dx = coord[i, 0] - coord[j, 0]
+    dy = coord[i, 1] - coord[j, 1]
+    dz = coord[i, 2] - coord[j, 2]
+    return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+
+def _point_angle(coord, i, j, k):
+    # j is the middle point
+    ux, uy, uz = coord[i, 0] - coord[j, 0], coord[i, 1] - coord[j, 1], coord[i, 2] - coord[j, 2]
+    vx, vy, vz = coord[k, 0] - coord[j, 0], coord[k, 1] - coord[j, 1], coord[k, 2] - coord[j, 2]
+    dt = (ux * vx + uy * vy + uz * vz) / math.sqrt(
+        (ux * ux + uy * uy + uz * uz) * (vx * vx + vy * vy + vz * vz)
+    )
+    return math.acos(min(1.0, max(-1.0, dt)))
+
+
+if HAS_NUMBA:
+    point_distance = njit(cache=True, fastmath=True)(_point_distance)
+    point_angle = njit(cache=True, fastmath=True)(_point_angle)
+
+else:
+
+    def point_distance(coord: np.ndarray, i: int, j: int):
+        """
+        Euclidean distance between points i and j
+        """
+        return np.sqrt(np.sum((coord[i] - coord[j]) ** 2))
+
+    def point_angle(coord: np.ndarray, i: int, j: int, k: int):
+        """
+        Angle i-j-k (radians), j is the middle point
+        """
+        v1 = coord[i] - coord[j]
+        v2 = coord[k] - coord[j]
+        # rounding can push the cosine of (anti)parallel vectors just outside of [-1, 1]
+        dt = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
+        return np.arccos(np.clip(dt, -1.0, 1.0))
@@ -0,0 +1,12 @@
+"""
+    Optional numba support, shared by the compiled kernels of molli.
+    If numba is not installed, `njit` is None (callers provide plain numpy versions instead) and `prange` is `range`.
+"""
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+HAS_NUMBA = njit is not None
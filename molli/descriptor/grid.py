@@ -8,6 +8,8 @@ import json
 
 from ._core import Descriptor
 
+_GRID_STR_PATTERN = re.compile(r"#(?P<L>[0-9]+),(?P<D>[0-9]+):(?P<G>.+);")
+
 
 class Grid:
     """
@@ -39,9 +41,10 @@ class Grid:
         """
         gs = f"#{len(self.gridpoints)},3:"
 
-        for x, y, z in self.gridpoints:
-            p = self.precision
-            gs += f"{x:0.{p}f},{y:0.{p}f},{z:0.{p}f};"
+        p = self.precision
+        gs += "".join(
+            f"{x:0.{p}f},{y:0.{p}f},{z:0.{p}f};" for x, y, z in self.gridpoints.tolist()
+        )
 
         return gs
 
@@ -51,7 +54,7 @@ class Grid:
         Import grid contents from a string
         """
 
-        m = re.match(r"#(?P<L>[0-9]+),(?P<D>[0-9]+):(?P<G>.+);", s)
+        m = _GRID_STR_PATTERN.match(s)
 
         L = int(m.group("L"))
         D = int(m.group("D"))
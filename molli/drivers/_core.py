@@ -1,16 +1,23 @@
 from __future__ import annotations
 import asyncio as aio
 from asyncio.subprocess import PIPE
-from typing import Callable, Dict, List, Awaitable
+from typing import Any, Callable, Dict, List, Awaitable
 from tempfile import TemporaryDirectory as TempDir, NamedTemporaryFile as TempFile
 import functools
 import os
+import shutil
+import signal
 from datetime import datetime
 from tempfile import mkstemp
 import pickle
+from collections import deque
 from ..dtypes import CollectionFile, Collection, Molecule
 from glob import glob
 
+SHM_DIR = "/dev/shm"
+# tmpfs is only used if it has at least this much free space (container defaults are often as small as 64 MB)
+SHM_MIN_FREE = 1 << 30
+
 
 class AsyncExternalDriver:
     """
@@ -21,12 +28,19 @@ class AsyncExternalDriver:
     And subsequently treat the problem as if it were I/O bound within the main code (actually it is CPU bound, but that is now OS's problem)
 
     nprocs is only respected where packages can make use of it
+    if use_shm == True: job directories are created on tmpfs (/dev/shm), if available and at least SHM_MIN_FREE bytes are free,
+    instead of `scratch_dir` (failed job dumps are still written into `scratch_dir`)
     """
 
     PREFIX = "molli-ad"
 
     def __init__(
-        self, name="", scratch_dir: str = "", nprocs: int = 1, encoding: str = "utf8"
+        self,
+        name="",
+        scratch_dir: str = "",
+        nprocs: int = 1,
+        encoding: str = "utf8",
+        use_shm: bool = False,
     ):
         self.scratch_dir = scratch_dir
         self.nprocs = nprocs
@@ -36,32 +50,74 @@ class AsyncExternalDriver:
         if not os.path.isdir(scratch_dir):
             os.makedirs(scratch_dir)
 
+        if (
+            use_shm
+            and os.path.ismount(SHM_DIR)
+            and os.access(SHM_DIR, os.W_OK)
+            and shutil.disk_usage(SHM_DIR).free >= SHM_MIN_FREE
+        ):
+            self.jobroot = SHM_DIR
+        else:
+            self.jobroot = scratch_dir
+
     async def aexec(
-        self, cmd: str, inp_files: Dict[str, str] = dict(), out_files: List[str] = []
+        self,
+        cmd: str,
+        inp_files: Dict[str, str] = None,
+        out_files: List[str] = None,
+        out_parsers: Dict[str, Callable[[str], Any]] = None,
+        capture_tail: int = None,
+        stdin: str = None,
     ):
         """
         Coroutine that asynchronously schedules a shell command to be executed
         Before the command is executed it writes temporary files (`inp_files`)
         After the command is executed, output files are harvested (`out_files`)
+        Files listed in `out_parsers` are not read in full: their paths are handed to the respective callables
+        If `capture_tail` is specified, only the last `capture_tail` bytes of stdout and stderr are retained
+        If `stdin` is specified, it is piped into the process instead of being written as a file
         returns: code, files, stdout, stderr
         """
+        inp_files = {} if inp_files is None else inp_files
+        out_files = [] if out_files is None else out_files
+        out_parsers = {} if out_parsers is None else out_parsers
 
-        with TempDir(prefix=self.prefix, dir=self.scratch_dir) as td:
+        with self.jobdir() as td:
             self.writefiles(td, inp_files)
             # Asynchronous process spawning code goes here
 
             _cmd = f"cd {td}; {cmd}"
 
-            proc = await aio.create_subprocess_shell(_cmd, stdout=PIPE, stderr=PIPE)
-            code = await proc.wait()
+            # the job gets its own process group, so that the shell and everything it started can be killed together
+            proc = await aio.create_subprocess_shell(
+                _cmd,
+                stdin=None if stdin is None else PIPE,
+                stdout=PIPE,
+                stderr=PIPE,
+                start_new_session=True,
+            )
 
-            _out = await proc.stdout.read()
-            _err = await proc.stdout.read()
-
-            stdout = _out.decode(self.encoding)
-            stderr = _err.decode(self.encoding)
+            try:
+                # pipes are fed and drained while the process runs, so that verbose programs cannot stall on a full pipe
+                _, _out, _err = await aio.gather(
+                    self.feedstream(proc.stdin, stdin, self.encoding),
+                    self.readstream(proc.stdout, capture_tail),
+                    self.readstream(proc.stderr, capture_tail),
+                )
+                code = await proc.wait()
+            except BaseException:
+                # cancelled (or failed while waiting): the processes must not outlive the job directory
+                self.killjob(proc)
+                await proc.wait()
+                raise
+
+            # a truncated tail may start in the middle of a multibyte character
+            errors = "strict" if capture_tail is None else "ignore"
+            stdout = _out.decode(self.encoding, errors=errors)
+            stderr = _err.decode(self.encoding, errors=errors)
 
             files = self.getfiles(td, out_files)
+            files.update(self.parsefiles(td, out_parsers))
 
             if code:
                 td_base = os.path.basename(td)
@@ -78,6 +134,71 @@ class AsyncExternalDriver:
     def _exec(self, *args, **kwargs):
         return aio.run(self.aexec(*args, **kwargs))
 
+    def jobdir(self):
+        """
+        Context manager that provides a clean working directory for a single job (and removes it afterwards)
+        """
+        return TempDir(prefix=self.prefix, dir=self.jobroot)
+
+    @staticmethod
+    def killjob(proc: aio.subprocess.Process):
+        """
+        Kill the process group of a job started by `aexec` (the shell and all of its children)
+        """
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    async def gather_jobs(*coros: Awaitable):
+        """
+        Same as asyncio.gather, but if one of the jobs fails, the remaining ones are cancelled (and awaited)
+        before the exception is re-raised. Cancelling an `aexec` job kills its processes (see `killjob`)
+        """
+        tasks = [aio.ensure_future(c) for c in coros]
+        try:
+            return await aio.gather(*tasks)
+        except BaseException:
+            for t in tasks:
+                t.cancel()
+            await aio.gather(*tasks, return_exceptions=True)
+            raise
+
+    @staticmethod
+    async def feedstream(stream: aio.StreamWriter, text: str, encoding: str = "utf8"):
+        """
+        Write `text` into a stream and close it. Does nothing if there is no text
+        """
+        if text is None:
+            return
+
+        try:
+            stream.write(text.encode(encoding))
+            await stream.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # the process exited without consuming all of its input
+            pass
+        finally:
+            stream.close()
+
+    @staticmethod
+    async def readstream(stream: aio.StreamReader, tail: int = None, chunk_size: int = 65536):
+        """
+        Read a stream until EOF. If `tail` is specified, only the last `tail` bytes are kept in memory
+        """
+        chunks = deque()
+        size = 0
+        while chunk := await stream.read(chunk_size):
+            chunks.append(chunk)
+            size += len(chunk)
+            if tail is not None:
+                while size - len(chunks[0]) >= tail:
+                    size -= len(chunks.popleft())
+
+        data = b"".join(chunks)
+        return data if tail is None else data[-tail:]
+
     @staticmethod
     def writefiles(dr: str, files: Dict[str, str], overwrite=False):
         """
@@ -112,6 +233,19 @@ class AsyncExternalDriver:
                     result[f] = fs.read()
         return result
 
+    @staticmethod
+    def parsefiles(dr: str, parsers: Dict[str, Callable[[str], Any]]):
+        """
+        Applies parsers to the files (by path) that are found in the directory, returns dictionary
+        Files that do not exist are silently skipped
+        """
+        result = dict()
+        for f in parsers:
+            path = os.path.join(dr, f)
+            if os.path.isfile(path):
+                result[f] = parsers[f](path)
+        return result
+
 
 class AsyncConcurrent:
     """
@@ -202,10 +336,9 @@ class AsyncConcurrent:
                     fd, fn = mkstemp(
                         prefix=f"{mol.name}.", suffix=".xml", dir=self.backup_dir
                     )
-                    with open(fn, "wt") as f:
-                        f.write(res.to_xml())
-
-                    os.close(fd)
+                    # backups are streamed into the descriptor that mkstemp has already opened
+                    with os.fdopen(fd, "wt") as f:
+                        res.write_xml(f)
 
     def _spawn_workers(self, fx: Awaitable, n=1):
         if hasattr(self, "_worker_pool"):
@@ -1,12 +1,11 @@
 from ._core import AsyncExternalDriver
+from .xtb import AsyncXTBDriver
 from ..dtypes import Atom, Bond, Molecule, CartesianGeometry
-from copy import deepcopy
 from datetime import datetime
 from glob import glob
 from warnings import warn
 from typing import List, Callable
-from math import ceil, pi
-from itertools import combinations
+from math import ceil
 import asyncio as aio
 
 def _parse_energies(_n: str):
@@ -55,9 +54,7 @@ class AsyncCRESTDriver(AsyncExternalDriver):
         atoms_constr = []
         for a in constr_val_angles:
             atoms_constr.extend(mol.get_atoms_by_symbol(a))
-        cinp = "$constrain\n"
-        cinp += self.gen_angle_constraints(mol, atoms_constr)
-        cinp += "$end\n"
+        cinp = "".join(("$constrain\n", self.gen_angle_constraints(mol, atoms_constr), "$end\n"))
 
         # command that will be used to execute xtb package
         _cmd = f"""crest {nn}_g0.xyz -{method} -quick -ewin {ewin:0.4f} -mdlen {mdlen:0.4f} -mddump {mddump:0.4f} -vbdump {vbdump:0.4f} -T {self.nprocs}"""
@@ -82,8 +79,8 @@ class AsyncCRESTDriver(AsyncExternalDriver):
         except:
             raise FileNotFoundError("crest_conformers.xyz")
 
-        geoms = [x for x, _, _ in CartesianGeometry.from_xyz(ens1)]
-        mol.embed_conformers(*geoms, mode="w")
+        geoms = CartesianGeometry.from_xyz_ensemble(ens1, len(mol.atoms))
+        mol.embed_conformers(geoms, mode="w")
 
         return mol
 
@@ -111,29 +108,59 @@ class AsyncCRESTDriver(AsyncExternalDriver):
         ens1 = files["crest_ensemble.xyz"]
         nrgs1 = files["crest.energies"]
 
-        geoms = [x for x, _, _ in CartesianGeometry.from_xyz(ens1)]
+        geoms = CartesianGeometry.from_xyz_ensemble(ens1, len(mol.atoms))
 
-        _mol = deepcopy(mol)
+        _mol = mol.clone_geom(conformers=False)
 
-        _mol.embed_conformers(*geoms, mode="w")
+        _mol.embed_conformers(geoms, mode="w")
         return _mol
 
         ### ADD CONFORMER PROPERTIES !!! ###
         # return (code, files, stdout, stderr) 
 
+    async def ensemble_optimize(
+        self,
+        mol: Molecule,
+        method: str = "gfn2",
+        in_place: bool = False,
+    ):
+        """
+        All conformers present in a molecule are reoptimized with the selected method in a single crest call (-mdopt),
+        so that the program startup and parameter loading are only paid once per ensemble.
+        Unlike confomer_screen, the ensemble is neither pruned nor sorted.
+        Constraints are not supported: use XTBDriver.optimize_conformers for that.
+        """
+        nn = mol.name
+        confs = mol.confs_to_multixyz()
+
+        _cmd = f"""crest -mdopt {nn}_confs.xyz -{method} -T {self.nprocs}"""
+
+        code, files, stdout, stderr = await self.aexec(
+            _cmd,
+            inp_files={f"{nn}_confs.xyz": confs},
+            out_files=["crest_ensemble.xyz"],
+        )
+
+        try:
+            ens1 = files["crest_ensemble.xyz"]
+        except:
+            raise FileNotFoundError("crest_ensemble.xyz")
+
+        geoms = CartesianGeometry.from_xyz_ensemble(ens1, len(mol.atoms))
+
+        if len(geoms) != len(mol.conformers):
+            raise ValueError(
+                f"{nn}: expected {len(mol.conformers)} optimized conformers, found {len(geoms)}"
+            )
+
+        _mol = mol if in_place else mol.clone_geom(conformers=False)
+        _mol.embed_conformers(geoms, mode="w")
+        return _mol
+
 
 
     @staticmethod
     def gen_angle_constraints(mol: Molecule, atoms: List[Atom]):
         """ Generate constraints for all angles where atom is the middle atom """
-        constr = ""
-        for a in atoms:
-            neigbors = mol.get_connected_atoms(a)
-            for a1, a2 in combinations(neigbors, 2):
-                i1 = mol.get_atom_idx(a1) + 1
-                i2 = mol.get_atom_idx(a) + 1
-                i3 = mol.get_atom_idx(a2) + 1
-                angle = mol.get_angle(a1, a, a2) * 180 / pi
-                constr += f"  angle: {i1}, {i2}, {i3}, {angle:0.4f}\n"
-
-        return constr
\ No newline at end of file
+        # same constraint syntax as xtb: reuse the vectorized (triu_indices based) generator
+        return AsyncXTBDriver.gen_angle_constraints(mol, atoms)
\ No newline at end of file
@@ -11,23 +11,22 @@ class AsyncOpenBabelDriver(AsyncExternalDriver):
         """
         Convert string molecule representation into something else.
         Useful argument: '-h' adds hydrogens
+
+        The molecule is piped through obabel, and the converted text is taken from its stdout.
+        Raises RuntimeError if obabel exits with a non-zero code or does not produce any output
+        (when the output went into a file, a missing file surfaced as a bare KeyError instead)
         """
-        _cmd = f"obabel -i{src} source -o{dest} -O converted " + " ".join(args)
+        _cmd = f"obabel -i{src} -o{dest} " + " ".join(args)
 
         # pylint: disable=unused-variable
-        code, files, stdout, stderr = await self.aexec(
-            _cmd, inp_files={f"source": mol_text}, out_files=[f"converted"]
-        )
+        code, files, stdout, stderr = await self.aexec(_cmd, stdin=mol_text)
 
-        try:
-            res = files[f"converted"]
-        except:
+        if code or not stdout:
             print(stderr)
             print(stdout)
-            print(files)
-            raise
+            raise RuntimeError(f"obabel conversion {src} -> {dest} failed")
 
-        return res
+        return stdout
 
     async def add_hydrogens(self, mol_text, fmt: str = "mol2"):
         """
@@ -112,7 +111,7 @@ class AsyncOpenBabelDriver(AsyncExternalDriver):
         except:
             raise FileNotFoundError("conformers.xyz")
 
-        geoms = [x for x, _, _ in CartesianGeometry.from_xyz(confs)]
-        mol.embed_conformers(*geoms, mode="w")
+        geoms = CartesianGeometry.from_xyz_ensemble(confs, len(mol.atoms))
+        mol.embed_conformers(geoms, mode="w")
 
         return mol
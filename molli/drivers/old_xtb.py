@@ -4,7 +4,6 @@
 import os
 from ._core import ExternalDriver, DriverError
 from ..dtypes import Atom, Bond, Molecule, CartesianGeometry
-from copy import deepcopy
 from datetime import datetime
 from glob import glob
 from warnings import warn
@@ -59,10 +58,10 @@ class XTBDriver(ExternalDriver):
         angles = [(a1, a2, a3, val1), ...]
         scan = [(idx, val_start, val_end, steps)]
         """
-        result = f"$constrain\n  force constant= {fc}\n"
+        result = [f"$constrain\n  force constant= {fc}\n"]
         for a1, a2, val in distances:
             i1, i2 = mol.get_atom_idx(a1), mol.get_atom_idx(a2)
-            result += f"  distance: {i1+1}, {i2+1}, {val}\n"
+            result.append(f"  distance: {i1+1}, {i2+1}, {val}\n")
 
         for a1, a2, a3, val in angles:
             i1, i2, i3 = (
@@ -70,7 +69,7 @@ class XTBDriver(ExternalDriver):
                 mol.get_atom_idx(a2),
                 mol.get_atom_idx(a3),
             )
-            result += f"  angle: {i1+1}, {i2+1}, {i3+1}, {val}\n"
+            result.append(f"  angle: {i1+1}, {i2+1}, {i3+1}, {val}\n")
 
         for a1, a2, a3, a4, val in dihedrals:
             i1, i2, i3, i4 = (
@@ -79,18 +78,18 @@ class XTBDriver(ExternalDriver):
                 mol.get_atom_idx(a3),
                 mol.get_atom_idx(a4),
             )
-            result += f"  dihedral: {i1+1}, {i2+1}, {i3+1}, {i4+1}, {val}\n"
+            result.append(f"  dihedral: {i1+1}, {i2+1}, {i3+1}, {i4+1}, {val}\n")
 
         if scans:
-            result += "$scan\n"
+            result.append("$scan\n")
             if concerted and len(scans) > 1:
-                result += "  mode = concerted\n"
+                result.append("  mode = concerted\n")
             for idx, start, end, steps in scans:
-                result += f"  {idx}: {start}, {end}, {steps}\n"
+                result.append(f"  {idx}: {start}, {end}, {steps}\n")
 
-        result += f"$opt\n  maxcycle={maxcycle}\n$end\n"
+        result.append(f"$opt\n  maxcycle={maxcycle}\n$end\n")
 
-        return result
+        return "".join(result)
 
     def optimize(
         self,
@@ -143,7 +142,7 @@ class XTBDriver(ExternalDriver):
         self.cleanup(sdr)
 
         if not in_place:
-            mol1 = deepcopy(mol)
+            mol1 = mol.clone_geom()
             mol1.update_geom_from_xyz(nxyz, assert_single=True)
             return mol1
         else:
@@ -172,43 +171,43 @@ class XTBDriver(ExternalDriver):
 
         if not tbf:
             return mol
-        inp = f"$constrain\n  force constant={force_const}\n"
+        inp = [f"$constrain\n  force constant={force_const}\n"]
 
         lb_atoms = set()
 
         for b in tbf:
             a1, a2 = mol.get_atom_idx(b.a1), mol.get_atom_idx(b.a2)
-            inp += f"  distance: {a1+1}, {a2+1}, {tbf[b]:0.4f}\n"
+            inp.append(f"  distance: {a1+1}, {a2+1}, {tbf[b]:0.4f}\n")
             lb_atoms.add(b.a1)
             lb_atoms.add(b.a2)
 
         # generate constraints for C-H bonds
         core_bonds = tuple(mol.yield_bonds(*constrain_bonds))
-        inp += self.gen_bond_constraints(mol, core_bonds)
-        inp += self.gen_angle_constraints(mol, lb_atoms)
+        inp.append(self.gen_bond_constraints(mol, core_bonds))
+        inp.append(self.gen_angle_constraints(mol, lb_atoms))
 
-        inp += "$scan\n  mode=concerted\n"
+        inp.append("$scan\n  mode=concerted\n")
         for i, b in enumerate(tbf):
-            inp += f"  {i+1}: {tbf[b]:0.4f}, {target_len:0.4f}, {rss_steps}\n"
+            inp.append(f"  {i+1}: {tbf[b]:0.4f}, {target_len:0.4f}, {rss_steps}\n")
 
-        inp += f"$opt\n  maxcycle={rss_maxcycle}\n"
-        inp += "$end\n"
+        inp.append(f"$opt\n  maxcycle={rss_maxcycle}\n")
+        inp.append("$end\n")
 
-        m1 = self.optimize(mol, crit="crude", in_place=False, xtbinp=inp, fn_suffix=0)
+        m1 = self.optimize(mol, crit="crude", in_place=False, xtbinp="".join(inp), fn_suffix=0)
 
         return m1
     
     def gen_bond_constraints(self, mol: Molecule, bonds: List[Bond]):
         """ Generate bond distance constraint list """
-        constr = ""
+        constr = []
         for b in bonds:
             a1, a2 = mol.get_atom_idx(b.a1), mol.get_atom_idx(b.a2)
-            constr += f"  distance: {a1+1}, {a2+1}, {mol.get_bond_length(b):0.4f}\n"
-        return constr
+            constr.append(f"  distance: {a1+1}, {a2+1}, {mol.get_bond_length(b):0.4f}\n")
+        return "".join(constr)
     
     def gen_angle_constraints(self, mol: Molecule, atoms: List[Atom]):
         """ Generate constraints for all angles where atom is the middle atom """
-        constr = ""
+        constr = []
         for a in atoms:
             neigbors = mol.get_connected_atoms(a)
             for a1, a2 in combinations(neigbors, 2):
@@ -216,9 +215,9 @@ class XTBDriver(ExternalDriver):
                 i2 = mol.get_atom_idx(a) + 1
                 i3 = mol.get_atom_idx(a2) + 1
                 angle = mol.get_angle(a1, a, a2) * 180 / pi
-                constr += f"  angle: {i1}, {i2}, {i3}, {angle:0.4f}\n"
+                constr.append(f"  angle: {i1}, {i2}, {i3}, {angle:0.4f}\n")
         
-        return constr
+        return "".join(constr)
 
 
 
@@ -11,6 +11,10 @@ import asyncio as aio
 import numpy as np
 import re
 
+# Matches the final energy line of orca output, e.g.
+# FINAL SINGLE POINT ENERGY      -1234.567890123456
+_FINAL_ENERGY_RE = re.compile(r"FINAL SINGLE POINT ENERGY\s+(?P<eh>[0-9.-]+)")
+
 class AsyncORCADriver(AsyncExternalDriver):
     def __init__(self, name="", path="/opt/orca/orca_4_2_1_linux_x86-64_openmpi314/orca", scratch_dir="", nprocs=1, maxcore=3000, encoding="utf8"):
         super().__init__(
@@ -28,7 +32,7 @@ class AsyncORCADriver(AsyncExternalDriver):
         code, files, stdout, stderr = await self.aexec(f"{self.path} input", inp_files={f"struct.xyz" : xyz, "input" : _inp})
 
         for l in stdout.split('\n')[::-1]:
-            if m := re.match(r"FINAL SINGLE POINT ENERGY\s+(?P<eh>[0-9.-]+).*", l):
+            if m := _FINAL_ENERGY_RE.match(l):
                 return float(m['eh'])
 
     async def conformer_energies(self, mol: Molecule, method="B97-3c sloppyscf"):
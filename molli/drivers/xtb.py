@@ -1,23 +1,126 @@
 from ._core import AsyncExternalDriver
 from ..dtypes import Atom, Bond, Molecule, CartesianGeometry
 from ..parsing import extract_xtb_atomic_properties
-from copy import deepcopy
+from ..ftypes.xyz import read_last_xyz_block, parse_xyz
 from datetime import datetime
 from glob import glob
 from warnings import warn
 from typing import List, Callable
-from math import ceil, pi
+from math import ceil
 import numpy as np
-from itertools import combinations
+from contextlib import contextmanager
+from tempfile import mkdtemp
 import asyncio as aio
+import atexit
+import io
+import logging
+import os
 import re
+import shutil
+from functools import lru_cache
+
+log = logging.getLogger(__name__)
+
+# Line templates for xtb constraint files. %-formatting is used in the hot loops.
+_DISTANCE_FMT = "  distance: %d, %d, %.4f\n"
+_ANGLE_FMT = "  angle: %d, %d, %d, %.4f\n"
+
+# Matches the total energy line of xtb output, e.g.
+#           | TOTAL ENERGY             -172.541095318001 Eh   |
+_TOTAL_ENERGY_RE = re.compile(r"\|\s+TOTAL ENERGY\s+(-?\d+(?:\.\d+)?)\s+Eh")
+
+
+def _topology_key(mol: Molecule, idx_map: dict):
+    """
+    Hashable representation of the molecular graph: element symbols and bonds as atom index pairs
+    """
+    return (
+        tuple(a.symbol for a in mol.atoms),
+        tuple((idx_map[b.a1], idx_map[b.a2]) for b in mol.bonds),
+    )
+
+
+@lru_cache(maxsize=64)
+def _core_bond_indices(topology: tuple, b_types: tuple):
+    """
+    Indices of the bonds that match `b_types` (same order as Molecule.yield_bonds)
+    """
+    symbols, bonds = topology
+    result = []
+    for bt in b_types:
+        as1, as2 = bt.split("-")
+        for k, (i1, i2) in enumerate(bonds):
+            if {as1, as2} == {symbols[i1], symbols[i2]}:
+                result.append(k)
+    return tuple(result)
+
+
+@lru_cache(maxsize=64)
+def _adjacency(topology: tuple):
+    """
+    Indices of the connected atoms for every atom
+    """
+    symbols, bonds = topology
+    adj = [{} for _ in symbols]
+    for i1, i2 in bonds:
+        adj[i1][i2] = None
+        adj[i2][i1] = None
+    return tuple(tuple(x) for x in adj)
 
 
 class AsyncXTBDriver(AsyncExternalDriver):
-    def __init__(self, name="", scratch_dir="", nprocs=1, encoding="utf8"):
+    def __init__(
+        self, name="", scratch_dir="", nprocs=1, encoding="utf8", use_shm: bool = False
+    ):
+        """
+        All xtb jobs of this driver run in subdirectories of a single persistent job root.
+        if use_shm == True: the job root is placed on tmpfs (/dev/shm), if available and not short of space, so that xtb files never hit the disk.
+        Failed job dumps are still written into `scratch_dir`.
+        """
         super().__init__(
-            name=name, scratch_dir=scratch_dir, nprocs=nprocs, encoding=encoding
+            name=name,
+            scratch_dir=scratch_dir,
+            nprocs=nprocs,
+            encoding=encoding,
+            use_shm=use_shm,
         )
+        self._scratch = mkdtemp(prefix=self.prefix, dir=self.jobroot)
+        # copies of the driver (forked or unpickled worker processes) share the job root, only its creator removes it
+        self._owner_pid = os.getpid()
+        atexit.register(self._remove_scratch)
+
+    def _remove_scratch(self):
+        if os.getpid() == self._owner_pid:
+            shutil.rmtree(self._scratch, ignore_errors=True)
+
+    async def aexec(self, cmd: str, *args, **kwargs):
+        """
+        Every xtb invocation is logged at DEBUG level (and not printed)
+        """
+        log.debug("%s", cmd)
+        return await super().aexec(cmd, *args, **kwargs)
+
+    @contextmanager
+    def jobdir(self):
+        """
+        Job directories are unique subdirectories of the persistent job root (also across copies of the driver)
+        """
+        td = mkdtemp(dir=self._scratch)
+        try:
+            yield td
+        finally:
+            shutil.rmtree(td, ignore_errors=True)
+
+    @staticmethod
+    def yield_core_bonds(mol: Molecule, *b_types, topology: tuple = None):
+        """
+        Cached version of `mol.yield_bonds(*b_types)` that returns a tuple of bonds.
+        The matching is memoized by topology, so it is shared by all molecules (and conformers) with the same connectivity.
+        """
+        if topology is None:
+            topology = _topology_key(mol, {a: i for i, a in enumerate(mol.atoms)})
+
+        return tuple(mol.bonds[k] for k in _core_bond_indices(topology, b_types))
 
     async def optimize(
         self,
@@ -44,7 +147,7 @@ class AsyncXTBDriver(AsyncExternalDriver):
         )
 
         if not in_place:
-            mol1 = deepcopy(mol)
+            mol1 = mol.clone_geom()
             mol1.update_geom_from_xyz(optimized, assert_single=True)
             return mol1
         else:
@@ -58,20 +161,41 @@ class AsyncXTBDriver(AsyncExternalDriver):
         xtbinp: str = "",
         maxiter: int = 50,
         xyz_name: str = "mol",
+        recover: bool = False,
+        nprocs: int = None,
     ):
-        # command that will be used to execute xtb package
-        _cmd = f"""xtb {xyz_name}.xyz --{method} --opt {crit} --cycles {maxiter} {"--input param.inp" if xtbinp else ""} -P {self.nprocs}"""
+        """
+        if recover == True: when xtb fails to produce xtbopt.xyz (e.g. the optimization did not converge),
+        the last frame of the optimization trajectory (xtbopt.log) is returned instead
+        `nprocs` overrides the number of xtb threads of the driver
+        """
+        nprocs = self.nprocs if nprocs is None else nprocs
+        # command line arguments for xtb, all formatted as strings up front
+        args = ["xtb", f"{xyz_name}.xyz", f"--{method}", "--opt", crit, "--cycles", str(maxiter)]
+        inp_files = {f"{xyz_name}.xyz": xyz}
+
+        # the constraint file is only written when there is one
+        if xtbinp:
+            args += ["--input", "param.inp"]
+            inp_files["param.inp"] = xtbinp
+
+        args += ["-P", str(nprocs)]
+        _cmd = " ".join(args)
 
         # pylint: disable=unused-variable
         code, files, stdout, stderr = await self.aexec(
             _cmd,
-            inp_files={f"{xyz_name}.xyz": xyz, "param.inp": xtbinp},
+            inp_files=inp_files,
             out_files=["xtbopt.xyz"],
+            out_parsers={"xtbopt.log": read_last_xyz_block} if recover else dict(),
         )
 
         if "xtbopt.xyz" in files:
             nxyz = files["xtbopt.xyz"]
             return nxyz
+        elif "xtbopt.log" in files:
+            warn(f"{xyz_name}: xtbopt.xyz not found. Recovered the last frame of xtbopt.log")
+            return files["xtbopt.log"]
         else:
             raise FileNotFoundError("Could not locate xtb output file.")
 
@@ -83,35 +207,47 @@ class AsyncXTBDriver(AsyncExternalDriver):
         xtbinp: str = "",
         maxiter: int = 50,
         in_place: bool = False,
+        max_parallel: int = None,
     ):
         """
         Perform the same sort of optimization as used in optimize(),
         but for each conformer instead of for the molecule's main geometry.
+
+        Up to `max_parallel` (defaults to nprocs) conformers are optimized concurrently.
+        Parallel xtb jobs are run with one thread each, so that nprocs cores are used in total.
         """
         xyzs = mol.confs_to_xyzs()
         nn = mol.name
 
-        optimized_confs = []
-        for i, xyz in enumerate(xyzs):
-            mol_name = nn + f"_{i}"
-            optimized = await self.xyz_optimize(
-                xyz,
-                method=method,
-                crit=crit,
-                xtbinp=xtbinp,
-                maxiter=maxiter,
-                xyz_name=mol_name,
-            )
-            optimized_confs.append(optimized)
-
-        geoms = [CartesianGeometry.from_xyz(conf)[0][0] for conf in optimized_confs]
+        max_parallel = self.nprocs if max_parallel is None else max_parallel
+        job_nprocs = 1 if max_parallel > 1 else self.nprocs
+        sem = aio.Semaphore(max_parallel)
+
+        # optimized frames are parsed as soon as they arrive, straight into one coordinate array
+        geoms = np.empty((len(xyzs), len(mol.atoms), 3), dtype=np.float32)
+
+        async def _optimize(i: int, xyz: str):
+            async with sem:
+                optimized = await self.xyz_optimize(
+                    xyz,
+                    method=method,
+                    crit=crit,
+                    xtbinp=xtbinp,
+                    maxiter=maxiter,
+                    xyz_name=nn + f"_{i}",
+                    nprocs=job_nprocs,
+                )
+            geoms[i] = parse_xyz(optimized, single=True)[0]
+
+        await self.gather_jobs(*(_optimize(i, xyz) for i, xyz in enumerate(xyzs)))
+
         if in_place:
-            mol.embed_conformers(*geoms, mode="w")
+            mol.embed_conformers(geoms, mode="w")
             # return a value other than None so that it will display to the user as successful
             return True
         else:
-            mol1 = deepcopy(mol)
-            mol1.embed_conformers(*geoms, mode="w")
+            mol1 = mol.clone_geom(conformers=False)
+            mol1.embed_conformers(geoms, mode="w")
             return mol1
 
     async def fix_long_bonds(
@@ -129,78 +265,118 @@ class AsyncXTBDriver(AsyncExternalDriver):
     ):
         """
         Fix all long bonds in the molecule by doing a relaxed surface scan with coordinates constrained
+        if in_place == False: returns a new molecule (even if there was nothing to fix), otherwise updates `mol`
         """
-        tbf = {}  # to be fixed
-        for b in mol.bonds:
-            if b not in tbf and mol.get_bond_length(b) >= rss_length_thresh:
-                tbf[b] = mol.get_bond_length(b)
+        # to be fixed
+        tbf = {
+            b: l
+            for b, l in ((b, mol.get_bond_length(b)) for b in mol.bonds)
+            if l >= rss_length_thresh
+        }
 
         if not tbf:
-            return mol
-        inp = f"$constrain\n  force constant={force_const}\n"
+            return mol if in_place else mol.clone_geom()
+
+        # all sections of the xtb input are written into a single buffer
+        buf = io.StringIO()
+        buf.write(f"$constrain\n  force constant={force_const}\n")
 
         lb_atoms = set()
+        idx_map = {a: i for i, a in enumerate(mol.atoms)}
+        topology = _topology_key(mol, idx_map)
 
         for b in tbf:
-            a1, a2 = mol.get_atom_idx(b.a1), mol.get_atom_idx(b.a2)
-            inp += f"  distance: {a1+1}, {a2+1}, {tbf[b]:0.4f}\n"
+            a1, a2 = idx_map[b.a1], idx_map[b.a2]
+            buf.write(_DISTANCE_FMT % (a1 + 1, a2 + 1, tbf[b]))
             lb_atoms.add(b.a1)
             lb_atoms.add(b.a2)
 
         # generate constraints for C-H bonds
-        core_bonds = tuple(mol.yield_bonds(*constrain_bonds))
-        inp += self.gen_bond_constraints(mol, core_bonds)
-        inp += self.gen_angle_constraints(mol, lb_atoms)
+        core_bonds = self.yield_core_bonds(mol, *constrain_bonds, topology=topology)
+        self.gen_bond_constraints(mol, core_bonds, buf=buf, idx_map=idx_map)
+        self.gen_angle_constraints(
+            mol, lb_atoms, buf=buf, idx_map=idx_map, adjacency=_adjacency(topology)
+        )
 
-        inp += "$scan\n  mode=concerted\n"
+        buf.write("$scan\n  mode=concerted\n")
         for i, b in enumerate(tbf):
-            inp += f"  {i+1}: {tbf[b]:0.4f}, {target_len:0.4f}, {rss_steps}\n"
+            buf.write(f"  {i+1}: {tbf[b]:0.4f}, {target_len:0.4f}, {rss_steps}\n")
 
-        inp += f"$opt\n  maxcycle={rss_maxcycle}\n"
-        inp += "$end\n"
+        buf.write(f"$opt\n  maxcycle={rss_maxcycle}\n")
+        buf.write("$end\n")
 
         m1 = await self.optimize(
             mol,
             method=method,
             crit="crude",
-            xtbinp=inp,
-            in_place=False,
+            xtbinp=buf.getvalue(),
+            in_place=in_place,
         )
 
-        return m1
+        return mol if in_place else m1
 
-    async def xyz_energy(self, xyz: str, method: str = "gfn2", accuracy: float = 1.0):
+    async def xyz_energy(
+        self, xyz: str, method: str = "gfn2", accuracy: float = 1.0, nprocs: int = None
+    ):
+        """
+        if `nprocs` is specified, the number of xtb threads is set explicitly
+        """
         _cmd = f"""xtb struct.xyz --{method} --acc {accuracy:0.2f}"""
+        if nprocs is not None:
+            _cmd += f" -P {nprocs}"
 
         code, files, stdout, stderr = await self.aexec(
-            _cmd, inp_files={f"struct.xyz": xyz}
+            _cmd, inp_files={f"struct.xyz": xyz}, capture_tail=65536
         )
 
         # This is what we are trying to find in the output file
         # | TOTAL ENERGY             -172.541095318001 Eh   |
+        # It is printed at the very end, so only the tail of the output is retained and searched first
+
+        tail = stdout[-8192:]
+        if (i := tail.rfind("TOTAL ENERGY")) >= 0:
+            try:
+                return float(tail[i:].split(maxsplit=3)[2])
+            except (IndexError, ValueError):
+                pass
 
         for l in stdout.split("\n")[::-1]:
-            if m := re.match(r"\s+\|\s+TOTAL ENERGY\s+(?P<eh>[0-9.-]+)\s+Eh\s+\|.*", l):
-                return float(m["eh"])
+            if m := _TOTAL_ENERGY_RE.search(l):
+                return float(m[1])
 
     async def conformer_energies(
-        self, mol: Molecule, method: str = "gfn2", accuracy: float = 1.0
+        self,
+        mol: Molecule,
+        method: str = "gfn2",
+        accuracy: float = 1.0,
+        max_parallel: int = None,
     ):
         """
         Returns relative conformer energies in kJ/mol
         The relative energies are referenced to the first conformer
+
+        Up to `max_parallel` (defaults to nprocs) single point calculations are run concurrently.
         """
         xyzs = mol.confs_to_xyzs()
         nn = mol.name
-        energies = []
 
-        for i, xyz in enumerate(xyzs):
-            conf_energy = await self.xyz_energy(xyz, method=method, accuracy=accuracy)
-            energies.append(conf_energy)
+        max_parallel = self.nprocs if max_parallel is None else max_parallel
+        job_nprocs = 1 if max_parallel > 1 else None
+        sem = aio.Semaphore(max_parallel)
 
-        ref_energy = energies[0]
+        async def _energy(xyz: str):
+            async with sem:
+                return await self.xyz_energy(
+                    xyz, method=method, accuracy=accuracy, nprocs=job_nprocs
+                )
 
-        return (np.array(energies) - ref_energy) * 2625.5  # conversion to kJ/mol
+        energies = np.empty(len(xyzs), dtype=np.float64)
+        energies[:] = await self.gather_jobs(*(_energy(xyz) for xyz in xyzs))
+
+        energies -= energies[0]
+        energies *= 2625.5  # conversion to kJ/mol
+
+        return energies
 
     async def charges(
         self,
@@ -222,7 +398,7 @@ class AsyncXTBDriver(AsyncExternalDriver):
             _cmd, inp_files={f"struct.xyz": xyz}, out_files=["charges"]
         )
 
-        charges = np.array(list(map(float, files["charges"].split())), dtype=np.float32)
+        charges = np.fromstring(files["charges"], sep=" ", dtype=np.float32)
 
         return charges
 
@@ -263,25 +439,65 @@ class AsyncXTBDriver(AsyncExternalDriver):
     #### Ian dev end
 
     @staticmethod
-    def gen_bond_constraints(mol: Molecule, bonds: List[Bond]):
-        """Generate bond distance constraint list"""
-        constr = ""
+    def gen_bond_constraints(
+        mol: Molecule, bonds: List[Bond], buf: io.StringIO = None, idx_map: dict = None
+    ):
+        """
+        Generate bond distance constraint list
+        If `buf` is provided, constraints are written into it and nothing is returned
+        `idx_map` is an optional precomputed {atom: index} map
+        """
+        if idx_map is None:
+            idx_map = {a: i for i, a in enumerate(mol.atoms)}
+
+        constr = io.StringIO() if buf is None else buf
         for b in bonds:
-            a1, a2 = mol.get_atom_idx(b.a1), mol.get_atom_idx(b.a2)
-            constr += f"  distance: {a1+1}, {a2+1}, {mol.get_bond_length(b):0.4f}\n"
-        return constr
+            a1, a2 = idx_map[b.a1], idx_map[b.a2]
+            constr.write(_DISTANCE_FMT % (a1 + 1, a2 + 1, mol.geom.get_distance(a1, a2)))
+
+        if buf is None:
+            return constr.getvalue()
 
     @staticmethod
-    def gen_angle_constraints(mol: Molecule, atoms: List[Atom]):
-        """Generate constraints for all angles where atom is the middle atom"""
-        constr = ""
+    def gen_angle_constraints(
+        mol: Molecule,
+        atoms: List[Atom],
+        buf: io.StringIO = None,
+        idx_map: dict = None,
+        adjacency: tuple = None,
+    ):
+        """
+        Generate constraints for all angles where atom is the middle atom
+        If `buf` is provided, constraints are written into it and nothing is returned
+        `idx_map` is an optional precomputed {atom: index} map
+        `adjacency` is an optional precomputed tuple of connected atom indices for every atom
+        """
+        if idx_map is None:
+            idx_map = {a: i for i, a in enumerate(mol.atoms)}
+
+        constr = io.StringIO() if buf is None else buf
+        coord = mol.geom.coord
         for a in atoms:
-            neigbors = mol.get_connected_atoms(a)
-            for a1, a2 in combinations(neigbors, 2):
-                i1 = mol.get_atom_idx(a1) + 1
-                i2 = mol.get_atom_idx(a) + 1
-                i3 = mol.get_atom_idx(a2) + 1
-                angle = mol.get_angle(a1, a, a2) * 180 / pi
-                constr += f"  angle: {i1}, {i2}, {i3}, {angle:0.4f}\n"
-
-        return constr
+            ic = idx_map[a]
+            if adjacency is None:
+                inb = [idx_map[n] for n in mol.get_connected_atoms(a)]
+            else:
+                inb = adjacency[ic]
+
+            k = len(inb)
+            if k < 2:
+                continue
+
+            # All angles around the middle atom at once: pairs follow the same order as combinations()
+            inb = np.array(inb)
+            v = coord[inb] - coord[ic]
+            norms = np.linalg.norm(v, axis=1)
+            cos = (v @ v.T) / np.outer(norms, norms)
+            iu, ju = np.triu_indices(k, 1)
+            angles = np.degrees(np.arccos(np.clip(cos[iu, ju], -1.0, 1.0)))
+
+            for i1, i3, angle in zip(inb[iu] + 1, inb[ju] + 1, angles):
+                constr.write(_ANGLE_FMT % (i1, ic + 1, i3, angle))
+
+        if buf is None:
+            return constr.getvalue()
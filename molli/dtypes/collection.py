@@ -2,13 +2,53 @@ from __future__ import annotations
 from .molecule import Molecule
 from datetime import datetime
 from typing import List, Callable, Any, Awaitable
-import json
 from zipfile import ZipFile
-from itertools import product, combinations_with_replacement
+from itertools import combinations_with_replacement
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import Pool
+from functools import partial
+from contextlib import contextmanager
+from time import perf_counter
 import asyncio as aio
+import os
+import gc
 import numpy as np
 
+# orjson is considerably faster for the (potentially huge) collection manifests, but it is optional
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+
+except ImportError:
+    from json import dumps as _dumps, loads as _loads
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Suspend the cyclic garbage collector while a large number of objects is being created.
+    Bulk parsing only allocates, so collection passes triggered along the way would find nothing to free.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _indexed_call(fx: Callable[[Molecule], Any], item: tuple):
+    """
+    Helper for unordered parallel mapping: keeps track of the position of the molecule
+    """
+    i, m = item
+    return i, fx(m)
+
 
 class Collection:
     """
@@ -17,10 +57,16 @@ class Collection:
     Therefore it is refactored a little bit
     """
 
-    def __init__(self, name: str = "", molecules: List[Molecule] = []):
+    # applyfx: max. number of molecules used to time fx, target duration (s) of a chunk of parallel work,
+    # and the estimated total duration (s) below which molecules are processed serially anyway
+    PROBE_SIZE = 16
+    CHUNK_TIME = 0.1
+    SERIAL_TIME = 2.0
+
+    def __init__(self, name: str = "", molecules: List[Molecule] = None):
         self.name = name
-        self.molecules = molecules
-        self.mol_index = [x.name for x in molecules]
+        self.molecules = [] if molecules is None else list(molecules)
+        self.mol_index = [x.name for x in self.molecules]
 
     def add(self, m: Molecule):
         self.molecules.append(m)
@@ -36,44 +82,61 @@ class Collection:
     def __iter__(self):
         return iter(self.molecules)
 
+    def _name_index(self, name: str) -> int:
+        """
+        Position of the first molecule with a given name. Uses a {name: position} map that is built lazily,
+        and rebuilt if the molecule list was replaced or resized, or if a hit no longer carries that name
+        """
+        key = (id(self.molecules), len(self.molecules))
+        idx = self.__dict__.get("_name_to_idx")
+        i = idx.get(name) if idx is not None and self._name_key == key else None
+
+        if i is None or self.molecules[i].name != name:
+            idx = {}
+            for k, m in enumerate(self.molecules):
+                idx.setdefault(m.name, k)
+            self._name_to_idx, self._name_key = idx, key
+            i = idx[name]
+
+        return i
+
     def __getitem__(self, item) -> Molecule:
         if isinstance(item, int):
             return self.molecules[item]
         elif isinstance(item, str):
-            return self.molecules[self.mol_index.index(item)]
+            return self.molecules[self._name_index(item)]
         else:
             return Collection(self.name, self.molecules[item])
 
     def __setitem__(self, index, item):
-        if isinstance(index, int):
-            self.molecules[index] = item
-        elif isinstance(index, str):
-            self.molecules[self.mol_index.index(index)] = item
+        if isinstance(index, str):
+            index = self._name_index(index)
+
+        self.molecules[index] = item
+        if isinstance(index, slice):
+            self.mol_index = [m.name for m in self.molecules]
+        else:
+            self.mol_index[index] = item.name
+        # the replaced molecule may have been the first one with its name
+        self._name_to_idx = None
 
     def bounding_box(self):
         """
         Get the rectangular space that encompasses all atoms in all conformers
         """
-        mins = []
-        maxs = []
-
-        for m in self.molecules:
-            rmin, rmax = m.bounding_box()
-            mins.append(rmin)
-            maxs.append(rmax)
+        mins = np.empty((len(self.molecules), 3))
+        maxs = np.empty_like(mins)
 
-        rmin = np.min(mins, axis=(0,))
-        rmax = np.max(maxs, axis=(0,))
+        for i, m in enumerate(self.molecules):
+            mins[i], maxs[i] = m.bounding_box()
 
-        return rmin, rmax
+        return mins.min(axis=0), maxs.max(axis=0)
 
     def to_multixyz(self, fn: str = None):
         """
         Return a multixyz representation of molecules
         """
-        result = ""
-        for m in self:
-            result += m.to_xyz()
+        result = "".join(m.to_xyz() for m in self)
 
         if fn:
             with open(fn, "wt") as f:
@@ -81,6 +144,13 @@ class Collection:
 
         return result
 
+    def write_multixyz(self, f):
+        """
+        Write a multixyz representation of molecules into an open text stream, one molecule at a time
+        """
+        for m in self:
+            f.write(m.to_xyz())
+
     def applyawt(self, aw: Awaitable, timeout=None, show_progress=True, update=1000):
         """
         This function is designed to mimic applyfx, but be useful with awaitables.
@@ -124,7 +194,7 @@ class Collection:
         Otherwise, it returns a list.
         """
 
-        def inner(workers=1, show_progress=True, update=1000):
+        def inner(workers=1, show_progress=True, update=1000, chunksize=None):
             result = []
 
             L = len(self.mol_index)
@@ -134,39 +204,58 @@ class Collection:
             if show_progress:
                 print(f"\nApplying [{fx.__name__}] to {L} molecules:")
 
-            if workers == 1:
-                for i, m in enumerate(self.molecules):
+            if workers > 1:
+                # fx is timed on the first molecules, in this process, until ~CHUNK_TIME has passed.
+                # These results are kept: the remaining molecules are then processed serially or in the pool
+                n_probe = 0
+                t0 = perf_counter()
+                for m in self.molecules[: self.PROBE_SIZE]:
                     result.append(fx(m))
+                    n_probe += 1
+                    if perf_counter() - t0 >= self.CHUNK_TIME:
+                        break
+                per_item = (perf_counter() - t0) / n_probe
+
+                # Starting the worker processes is not worth it for small workloads
+                if L * per_item < self.SERIAL_TIME:
+                    if show_progress:
+                        print(f"Small workload (~{L * per_item:.2f} s estimated), processing serially")
+                    workers = 1
+
+            if workers <= 1:
+                for i in range(len(result), L):
+                    result.append(fx(self.molecules[i]))
                     if show_progress and not (i + 1) % update:
                         print(
                             f"{i+1:>10} molecules processed ({(i+1)/L:>6.2%}) Total WCT: {datetime.now() - start}",
                             flush=True,
                         )
 
-            if workers > 1:
-
-                total = 0
-
-                batch_size = max(update, workers)
-                n_batches = L // batch_size + 1
-
-                result = []
-
-                for i in range(n_batches):
-                    chunk = self.molecules[
-                        i * batch_size : min((i + 1) * batch_size, L)
-                    ]
-
-                    with Pool(workers) as pool:
-                        result.extend(pool.map(fx, chunk))
+            else:
+                # Unless specified, chunks are sized to carry ~CHUNK_TIME of work each
+                if chunksize is None:
+                    chunksize = int(self.CHUNK_TIME / per_item) if per_item > 0 else L
+                    chunksize = min(max(1, chunksize), max(1, (L - n_probe) // workers))
+                    if show_progress:
+                        print(f"Estimated {per_item:.2e} s per molecule, chunksize={chunksize}")
 
-                    total += len(chunk)
+                result.extend([None] * (L - n_probe))
 
-                    if show_progress:
-                        print(
-                            f"{total:>10} molecules processed ({total/L:>6.2%}) Total WCT: {datetime.now() - start}",
-                            flush=True,
-                        )
+                # a single pool for the whole collection: results are streamed back as they complete,
+                # and put back in place, so a slow molecule does not hold up the ones after it
+                with Pool(workers) as pool:
+                    remaining = pool.imap_unordered(
+                        partial(_indexed_call, fx),
+                        enumerate(self.molecules[n_probe:], start=n_probe),
+                        chunksize=chunksize,
+                    )
+                    for i, (j, r) in enumerate(remaining, start=n_probe):
+                        result[j] = r
+                        if show_progress and not (i + 1) % update:
+                            print(
+                                f"{i+1:>10} molecules processed ({(i+1)/L:>6.2%}) Total WCT: {datetime.now() - start}",
+                                flush=True,
+                            )
 
             if show_progress:
                 print(f"Complete! Total WCT: {datetime.now() - start}\n")
@@ -185,11 +274,12 @@ class Collection:
         meta = {"name": self.name, "idx": self.mol_index, "files": []}
         with ZipFile(fpath, mode="w", compression=0, allowZip64=True) as zf:
             for i, m in enumerate(self.molecules):
-                zf.writestr(f"{i+1}.xml", m.to_xml())
+                with zf.open(f"{i+1}.xml", "w") as f:
+                    m.write_xml(f)
 
                 meta["files"].append(f"{i+1}.xml")
 
-            zf.writestr("__molli__", json.dumps(meta))
+            zf.writestr("__molli__", _dumps(meta))
 
     @classmethod
     def merge(cls, *collections: Collection, name="merged"):
@@ -204,27 +294,42 @@ class Collection:
         return res
 
     @classmethod
-    def from_zip(cls, fpath: str):
+    def from_zip(cls, fpath: str, nprocs: int = 1):
+        """
+        Load a molecule archive
+        if nprocs > 1: xml members are read first, then parsed by a pool of threads (order is preserved)
+        if nprocs is None: the number of threads is os.cpu_count()
+        """
 
         # restricted = ['__molli__']
-        molecules = []
-
         with ZipFile(fpath, mode="r", compression=0, allowZip64=True) as zf:
             with zf.open("__molli__") as f:
-                meta = json.load(f)
+                meta = _loads(f.read())
 
             if "files" in meta:
-                for fn in meta["files"]:
-                    with zf.open(fn, "r") as f:
-                        molecules.append(Molecule.from_file(f))
-
+                files = meta["files"]
             else:
-                for fn in zf.namelist():
-                    if fn in ["__molli__"]:
-                        pass
-                    else:
-                        with zf.open(fn, "r") as f:
-                            molecules.append(Molecule.from_file(f))
+                files = [fn for fn in zf.namelist() if fn not in ["__molli__"]]
+
+            def _load(fn: str):
+                if fn.endswith(".xml"):
+                    # members are stored uncompressed: a single read is essentially a copy
+                    return Molecule.from_xml_bytes(zf.read(fn))
+
+                with zf.open(fn, "r") as f:
+                    return Molecule.from_file(f)
+
+            nprocs = os.cpu_count() if nprocs is None else nprocs
+
+            with _gc_paused():
+                if nprocs > 1 and all(fn.endswith(".xml") for fn in files):
+                    # reads from the single archive are serial anyway: only the parsing is distributed.
+                    # from_xml_bytes only creates new objects, so it is safe to call from several threads
+                    blobs = [zf.read(fn) for fn in files]
+                    with ThreadPoolExecutor(max_workers=nprocs) as ex:
+                        molecules = list(ex.map(Molecule.from_xml_bytes, blobs))
+                else:
+                    molecules = list(map(_load, files))
 
         return cls(name=meta["name"], molecules=molecules)
 
@@ -243,8 +348,8 @@ class Collection:
         VERY USEFUL FOR IN SILICO LIBRARY GENERATION
         """
         molecules = []
-        for m1, m2 in product(mc1, mc2):
-            molecules.append(Molecule.join_ap(m1, m2, ap1=ap1, ap2=ap2, dist=dist))
+        for m1 in mc1:
+            molecules.extend(Molecule.join_batch(m1, mc2, ap1=ap1, ap2=ap2, dist=dist))
 
         return cls(name=f"{mc1.name}_{mc2.name}", molecules=molecules)
 
@@ -269,22 +374,27 @@ class CollectionFile:
     def __enter__(self):
         self._fstream = ZipFile(self.fpath, "r")
         with self._fstream.open("__molli__") as _mf:
-            self._meta = json.load(_mf)
-        self._collection = Collection(self._meta["name"])
+            self._meta = _loads(_mf.read())
+        self._collection = Collection(self._meta["name"], [])
         self.name = self._collection.name
+
+        # molecule name -> archive member, and the buffer of molecules that were already parsed
+        files = self._meta.get("files") or [f"{i+1}.xml" for i in range(len(self._meta["idx"]))]
+        self._fmap = dict(zip(self._meta["idx"], files))
+        self._buffer = {}
         return self
 
     def __getitem__(self, item: str):
-        if hasattr(self, "_collection") and item in self._collection.mol_index:
+        if hasattr(self, "_buffer") and item in self._buffer:
             # if collection (a buffer for molecule objects) exists
-            return self._collection[item]
+            return self._buffer[item]
         elif hasattr(self, "_fstream") and hasattr(self, "_meta"):
             # ie if the file is open
             # and the item was not located in the existing collection
-            idx = self._meta["idx"].index(item)
-            with self._fstream.open(f"{idx+1}.xml") as mf:
+            with self._fstream.open(self._fmap[item]) as mf:
                 m = Molecule.from_file(mf)
                 self._collection.add(m)
+                self._buffer[item] = m
 
             return m
 
@@ -296,12 +406,12 @@ class CollectionFile:
     def save(self):
         with ZipFile(self.fpath, "a") as zf:
             for m in self._collection.mol_index:
-                if m not in self._meta["idx"]:
+                if m not in self._fmap:
                     raise IndexError("Malformed zip")
                 else:
-                    fn = self._meta["files"][self._meta["idx"].index(m)]
+                    fn = self._fmap[m]
                     with zf.open(fn, "w") as mf:
-                        mf.write(bytes(self._collection[m].to_xml(), encoding="utf8"))
+                        self._collection[m].write_xml(mf)
 
     def __exit__(self, *args):
         self._fstream.close()
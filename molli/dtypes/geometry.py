@@ -2,13 +2,15 @@ from __future__ import annotations
 import numpy as np
 import re
 from typing import *  # pylint: disable=unused-wildcard-import
-from copy import deepcopy
+from copy import deepcopy, copy as shallowcopy
 
 from ..ftypes.xyz import parse_xyz
+from .._geometry_jit import point_distance, point_angle
 
 # pylint: disable=no-member
 
 _HDR_PATTERN = re.compile(r"(?P<c>[0-9]+),(?P<r>[0-9]+)#(?P<g>.+)")
+_GEOM_STR_PATTERN = re.compile(r"#(?P<L>[0-9]+),(?P<D>[0-9]+):(?P<G>.+);")
 
 
 def rotation_matrix(v1, v2, tol=1.0e-6):
@@ -64,6 +66,8 @@ class CartesianGeometry:
     *This class does not handle atom types.*
     """
 
+    __slots__ = ("precision", "unit", "coord", "N")
+
     def __init__(
         self,
         coord: np.ndarray = None,
@@ -84,6 +88,15 @@ class CartesianGeometry:
             self.coord = _coord
             self.N = self.coord.shape[0]
 
+    def copy(self) -> CartesianGeometry:
+        """
+        Independent copy of the geometry: a single array copy instead of a recursive `deepcopy`
+        """
+        g = shallowcopy(self)
+        if hasattr(self, "coord"):
+            g.coord = self.coord.copy()
+        return g
+
     def center_geom(self):
         """
         Centers the molecule on it's geometrical center
@@ -141,23 +154,24 @@ class CartesianGeometry:
         self.coord = np.delete(self.coord, idx, 0)
         self.N -= 1
 
+    def delete_many(self, idx: List[int]):
+        """
+        Delete several atoms from the geometry at once (indices refer to the geometry before deletion)
+        """
+        self.coord = np.delete(self.coord, idx, 0)
+        self.N = self.coord.shape[0]
+
     def get_distance(self, idx1: int, idx2: int):
         """
         Measure the Euclidean distance between two points
         """
-        p1 = self.coord[idx1]
-        p2 = self.coord[idx2]
-
-        return distance(p1, p2)
+        return point_distance(self.coord, idx1, idx2)
 
     def get_angle(self, idx1: int, idx2: int, idx3: int):
         """
         Measure the angle
         """
-        v1 = self.coord[idx1] - self.coord[idx2]
-        v2 = self.coord[idx3] - self.coord[idx2]
-        dt = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-        return np.arccos(dt)
+        return point_angle(self.coord, idx1, idx2, idx3)
 
     def get_coord(self, idx: int):
         return self.coord[idx]
@@ -168,9 +182,10 @@ class CartesianGeometry:
         """
         gs = f"#{self.N},3:"
 
-        for x, y, z in self.coord:
-            p = self.precision
-            gs += f"{x:0.{p}f},{y:0.{p}f},{z:0.{p}f};"
+        p = self.precision
+        gs += "".join(
+            f"{x:0.{p}f},{y:0.{p}f},{z:0.{p}f};" for x, y, z in self.coord.tolist()
+        )
 
         return gs
 
@@ -193,7 +208,7 @@ class CartesianGeometry:
         if u != "A":
             raise NotImplementedError
 
-        m = re.match(r"#(?P<L>[0-9]+),(?P<D>[0-9]+):(?P<G>.+);", s)
+        m = _GEOM_STR_PATTERN.match(s)
 
         L = int(m.group("L"))
         D = int(m.group("D"))
@@ -232,6 +247,27 @@ class CartesianGeometry:
                 res.append((cls(coord=coord), atoms, cmt))
             return res
 
+    @staticmethod
+    def from_xyz_ensemble(xyzs: str, natoms: int, dtype=np.float32) -> np.ndarray:
+        """
+        Parse a multixyz block where every frame has `natoms` atoms (e.g. a conformer ensemble)
+        in a single pass. Returns a (n_frames, natoms, 3) array
+        """
+        lines = xyzs.strip().splitlines()
+        stride = natoms + 2
+
+        if len(lines) % stride or any(int(l) != natoms for l in lines[::stride]):
+            raise SyntaxError(f"Not an ensemble of xyz frames with {natoms} atoms")
+
+        # drop the header and comment lines of every frame, and the element symbols
+        values = " ".join(
+            l.split(maxsplit=1)[1]
+            for k in range(0, len(lines), stride)
+            for l in lines[k + 2 : k + stride]
+        )
+
+        return np.fromstring(values, sep=" ", dtype=dtype).reshape(-1, natoms, 3)
+
     def to_xyz(self, atoms: List, comment: str = None):
         """
         Create an xyz file string out of the geometry and atom list
@@ -239,11 +275,10 @@ class CartesianGeometry:
         N = self.coord.shape[0]
         assert N == len(atoms)
 
-        res = f"{N}\n{comment if comment else 'Produced by molli'}\n"
-        for i, xyz in enumerate(self.coord):
-            x, y, z = xyz
-            res += f"{atoms[i]} {x:>10.4f} {y:>10.4f} {z:>10.4f}\n"
-        return res
+        res = [f"{N}\n{comment if comment else 'Produced by molli'}\n"]
+        for a, (x, y, z) in zip(atoms, self.coord.tolist()):
+            res.append(f"{a} {x:>10.4f} {y:>10.4f} {z:>10.4f}\n")
+        return "".join(res)
 
     def clone_geometry(self, other: CartesianGeometry):
         self.coord = deepcopy(other.coord)
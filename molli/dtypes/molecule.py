@@ -1,16 +1,23 @@
 from __future__ import annotations
 from .geometry import CartesianGeometry, rotation_matrix
-from typing import List, Dict, Union, Set, Any, Callable, overload
+from typing import List, Dict, Union, Set, Any, Callable, Iterable, overload
 import os
+import re
 import json
 
 # from ..parsing.mol2 import get_mol2_block_lines
-from copy import deepcopy
 import numpy as np
 from ..ftypes import parse_xyz
-from xml.dom import minidom as xmd
-from xml.etree.cElementTree import parse as xparse
-from io import IOBase
+
+# lxml provides the same pull parser interface with a faster tree builder, but it is optional
+try:
+    from lxml.etree import XMLPullParser
+except ImportError:
+    from xml.etree.cElementTree import XMLPullParser
+
+from io import IOBase, TextIOBase, TextIOWrapper
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 
 def yield_mol2_block_lines(title, text):
@@ -34,6 +41,103 @@ def get_mol2_block_lines(title: str, text: str) -> list:
     return list(yield_mol2_block_lines(title, text))
 
 
+_MOL2_HEADER = re.compile(r"@<TRIPOS>(\w+)")
+
+
+def read_mol2_sections(lines: Iterable[str | bytes]) -> Dict[str, List[str]]:
+    """
+    Split mol2 lines (e.g. an open file, walked once) into {section name: stripped lines}.
+    As in `get_mol2_block_lines`, a section ends at the first line that starts with @.
+    If a section is repeated, the first one is kept.
+    """
+    sections = {}
+    current = None
+
+    for l in lines:
+        if isinstance(l, bytes):
+            l = l.decode()
+        l = l.strip()
+
+        if l[:1] == "@":
+            current = None
+            if (m := _MOL2_HEADER.match(l)) and (title := m[1].upper()) not in sections:
+                current = sections[title] = []
+        elif current is not None:
+            current.append(l)
+
+    return sections
+
+
+def split_mol2_sections(text: str) -> Dict[str, List[str]]:
+    """
+    Same as `read_mol2_sections`, for a mol2 block given as a string
+    """
+    return read_mol2_sections(text.splitlines())
+
+
+def _xml_escape(value) -> str:
+    """
+    Escape a value for xml attributes and text (same set of characters as minidom)
+    """
+    return (
+        str(value)
+        .replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+def _read_chunks(f: IOBase, chunk_size: int = 65536):
+    """
+    Yield the contents of a file object in chunks
+    """
+    while chunk := f.read(chunk_size):
+        yield chunk
+
+
+def _xml_events(chunks):
+    """
+    Feed xml text (bytes or str) into a pull parser chunk by chunk, yielding (event, element) pairs
+    for the start and the end of every element as soon as they become available
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _format_mol2(name: str, topology: tuple, coord: np.ndarray) -> str:
+    """
+    Assemble a mol2 block from the output of `Molecule._mol2_topology` and a coordinate array
+    """
+    n_atoms, n_bonds, atom_parts, bond_block = topology
+
+    mol2 = [
+        f"@<TRIPOS>MOLECULE\n{name}\n{n_atoms} {n_bonds} 0 0 0\nSMALL\nGASTEIGER\n\n",
+        "@<TRIPOS>ATOM",
+    ]
+    mol2.extend(
+        f"{pre}{x:>10.4f} {y:>10.4f} {z:>10.4f}{post}"
+        for (pre, post), (x, y, z) in zip(atom_parts, coord.tolist())
+    )
+    mol2.extend(("\n@<TRIPOS>BOND", bond_block, "\n\n"))
+
+    return "".join(mol2)
+
+
+def _write_mol2(path: str, topology: tuple, item: tuple):
+    """
+    Write a mol2 file `path`/`name`.mol2, item is (name, coordinates)
+    """
+    name, coord = item
+    fn = os.path.normpath(os.path.join(path, f"{name}.mol2"))
+    with open(fn, "wt") as f:
+        f.write(_format_mol2(name, topology, coord))
+
+
 class Atom:
     """
     Symbol, label, atom type.
@@ -42,6 +146,8 @@ class Atom:
 
     """
 
+    __slots__ = ("label", "symbol", "atom_type", "stereo", "ap")
+
     def __init__(
         self,
         symbol: str,
@@ -66,12 +172,20 @@ class Atom:
     def set_attachment_point(self, v: bool = True):
         self.ap = v
 
+    def clone(self) -> Atom:
+        """
+        Copy of the atom (all attributes are immutable, so this is equivalent to a deepcopy)
+        """
+        return Atom(self.symbol, self.label, self.atom_type, self.stereo, self.ap)
+
 
 class Bond:
     """
     Chemical bond
     """
 
+    __slots__ = ("a1", "a2", "bond_type")
+
     def __init__(self, a1: Atom, a2: Atom, bond_type: str = None):
         self.a1 = a1
         self.a2 = a2
@@ -103,6 +217,43 @@ class Bond:
             return self.a1
 
 
+def _bumps_version(name: str):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+class _BondList(list):
+    """
+    List of bonds that counts its modifications, so that maps derived from it can tell when they went stale
+    """
+
+    version = 0
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(_BondList, _name, _bumps_version(_name))
+del _name
+
+
 class Fragment:
     """
     This class is not defined yet
@@ -140,7 +291,7 @@ def structure_clone(atoms: List[Atom], bonds: List[Bond]) -> (List[Atom], List[B
     new_bonds = []
 
     for a in atoms:
-        _a = deepcopy(a)
+        _a = a.clone()
         old_new_map[a] = _a
         new_atoms.append(_a)
 
@@ -166,14 +317,35 @@ class Molecule:
         atoms: List[Atom],
         bonds: List[Bond],
         geom: CartesianGeometry,
-        conformers: List[CartesianGeometry] = [],
+        conformers: List[CartesianGeometry] = None,
         clone: bool = True,
     ):
         """"""
         self.name = name
-        self.atoms, self.bonds = atoms, bonds
+        self.atoms, self.bonds = atoms, _BondList(bonds)
         self.geom = geom
-        self.conformers = conformers
+        self.conformers = [] if conformers is None else conformers
+
+    @property
+    def symbols(self) -> List[str]:
+        """
+        Element symbols of all atoms (in the order of the atom list)
+        """
+        return [a.symbol for a in self.atoms]
+
+    @property
+    def labels(self) -> List[str]:
+        """
+        Labels of all atoms (in the order of the atom list)
+        """
+        return [a.label for a in self.atoms]
+
+    @property
+    def atom_types(self) -> List[str]:
+        """
+        Atom types of all atoms (in the order of the atom list)
+        """
+        return [a.atom_type for a in self.atoms]
 
     def __contains__(self, x):
         if isinstance(x, Atom):
@@ -187,36 +359,36 @@ class Molecule:
         Parse a mol2 string and generate a Molecule object
         """
 
+        # files are walked line by line, a single pass collects all sections
         if isinstance(mol2s, str) and os.path.isfile(mol2s):
-            with open(mol2s) as f:
-                mol2block = f.read()
+            with open(mol2s, buffering=65536) as f:
+                sections = read_mol2_sections(f)
         elif hasattr(mol2s, "read"):
-            mol2block = mol2s.read()
+            sections = read_mol2_sections(mol2s)
         elif isinstance(mol2s, str):
-            mol2block = mol2s
+            sections = split_mol2_sections(mol2s)
         else:
             raise NotImplementedError
 
-        if isinstance(mol2block, bytes):
-            mol2block = mol2block.decode()
-
         ## Retrieving molecule metadata
-        mol2_header = get_mol2_block_lines("MOLECULE", mol2block)
+        mol2_header = sections["MOLECULE"]
         _name = mol2_header[0] if name == None else name
 
         ## Generating the list of atoms and molecular geometry
-        mol2_atoms = get_mol2_block_lines("ATOM", mol2block)
+        mol2_atoms = sections["ATOM"]
 
         _atoms = []
-        _geom = []
         for line in mol2_atoms:
             ls = line.split()
             sym = ls[5].rsplit(".")[0]
             _atoms.append(Atom(sym, ls[1], ls[5]))
-            _geom.append(list(map(float, ls[2:5])))
+
+        # coordinates are converted by numpy in one go (columns 3-5 of the atom block),
+        # straight into the precision that CartesianGeometry stores
+        _geom = np.loadtxt(mol2_atoms, usecols=(2, 3, 4), ndmin=2, dtype=np.float32)
 
         ## Generating the list of bonds
-        mol2_bonds = get_mol2_block_lines("BOND", mol2block)
+        mol2_bonds = sections["BOND"]
         _bonds = []
 
         for line in mol2_bonds:
@@ -232,6 +404,21 @@ class Molecule:
             name=_name, atoms=_atoms, bonds=_bonds, geom=CartesianGeometry(_geom)
         )
 
+    def clone_geom(self, conformers: bool = True) -> Molecule:
+        """
+        Cheap alternative to `deepcopy` for when only the geometry of the copy is going to change.
+        Atom and Bond objects are shared with the original molecule (the lists themselves are new);
+        the geometry and conformers are independent copies.
+        if conformers == False: the copy starts with an empty conformer list (use when they are about to be overwritten)
+        """
+        return self.__class__(
+            self.name,
+            atoms=list(self.atoms),
+            bonds=list(self.bonds),
+            geom=self.geom.copy(),
+            conformers=[c.copy() for c in self.conformers] if conformers else [],
+        )
+
     def has_confomers(self):
         """"""
         return True if self.conformers else False
@@ -256,19 +443,46 @@ class Molecule:
 
     def get_atom_idx(self, label: Atom | str):
         if isinstance(label, Atom):
-            return self.atoms.index(label)
+            return self._atom_index(label)
 
-        for a in self.atoms:
+        for i, a in enumerate(self.atoms):
             if a.label == label:
-                return self.atoms.index(a)
+                return i
 
         raise IndexError(f"Cannot find {label} in {self.name}")
 
+    def _atom_index(self, a: Atom) -> int:
+        """
+        Same as `self.atoms.index(a)`, but O(1): uses an {atom: index} map that is built lazily.
+        A hit is verified against the atom list, and the map is rebuilt if the list was modified
+        """
+        idx = self.__dict__.get("_atom_idx_map")
+        i = idx.get(a) if idx is not None else None
+
+        if i is None or i >= len(self.atoms) or self.atoms[i] is not a:
+            idx = {}
+            for k, x in enumerate(self.atoms):
+                idx.setdefault(x, k)
+            self._atom_idx_map = idx
+
+            if (i := idx.get(a)) is None:
+                raise ValueError(f"{a} is not in the atom list of {self.name}")
+
+        return i
+
     def add_bond(self, a1: Atom, a2: Atom, bond_type: str = "1"):
         """
         Create an additional bond
         """
-        self.bonds.append(Bond(a1, a2, bond_type=bond_type))
+        b = Bond(a1, a2, bond_type=bond_type)
+        adj = self._adjacency(build=False)
+        self.bonds.append(b)
+
+        if adj is not None:
+            adj.setdefault(a1, []).append(b)
+            if a2 is not a1:
+                adj.setdefault(a2, []).append(b)
+            self._adj_key = self._bonds_key()
 
     def add_attachment_atom(
         self, a1: Atom, a2: Atom, v: np.array, length: float, bond_type=1
@@ -281,7 +495,7 @@ class Molecule:
         Add an attachment atom to a specific atom in a molecule with a specified direction for the new bond.
         """
         # Get x,y,z for attachment point, then add scaled directional vector to get coords for new atom
-        a2_coord = self.geom.get_coord(self.atoms.index(a1)) + (length * v)
+        a2_coord = self.geom.get_coord(self._atom_index(a1)) + (length * v)
         assert len(a2_coord) == 3
         # print(self.geom.coord) ## Just checking... before/after
         # print(self.atoms)
@@ -293,12 +507,38 @@ class Molecule:
         # print(self.geom.coord)
         # print(self.atoms)
 
-    def get_bonds_with_atom(self, a: Atom):
-        res = []
+    def _bonds_key(self):
+        """
+        Identifies the current state of the bond list; None if it cannot be tracked (a plain list was assigned)
+        """
+        bonds = self.bonds
+        return (id(bonds), bonds.version) if isinstance(bonds, _BondList) else None
+
+    def _adjacency(self, build: bool = True) -> Dict[Atom, List[Bond]] | None:
+        """
+        {atom: [bonds with that atom]}, built lazily.
+        Rebuilt if the bond list was replaced or modified since it was built
+        """
+        key = self._bonds_key()
+        adj = self.__dict__.get("_adj")
+        if adj is not None and key is not None and self._adj_key == key:
+            return adj
+
+        if not build:
+            return None
+
+        adj = {}
         for b in self.bonds:
-            if a in b:
-                res.append(b)
-        return res
+            adj.setdefault(b.a1, []).append(b)
+            if b.a2 is not b.a1:
+                adj.setdefault(b.a2, []).append(b)
+
+        self._adj = adj
+        self._adj_key = key
+        return adj
+
+    def get_bonds_with_atom(self, a: Atom):
+        return list(self._adjacency().get(a, ()))
 
     def get_atom_valence(self, a: Atom):
         """
@@ -325,11 +565,7 @@ class Molecule:
         """
         Return a `set` of atoms connected to a given atom
         """
-        atoms = set()
-        for b in self.get_bonds_with_atom(a):
-            atoms.add(b.a1 if b.a2 == a else b.a2)
-
-        return atoms
+        return {b.a1 if b.a2 is a else b.a2 for b in self._adjacency().get(a, ())}
 
     def get_subgeom(self, atoms: List[Atom], conformer=-1):
         """
@@ -375,14 +611,14 @@ class Molecule:
             g = self.conformers[n]
 
         N = len(self.atoms)
-        res = f"{N}\n{self.name}\n"
-        for i, a in enumerate(self.atoms):
-            x, y, z = g.coord[i]
-            res += f"{a.symbol} {x:>10.4f} {y:>10.4f} {z:>10.4f}\n"
-        return res
+        # the symbol column is zipped with plain float rows of the coordinate array
+        res = [f"{N}\n{self.name}\n"]
+        for s, (x, y, z) in zip(self.symbols, g.coord.tolist()):
+            res.append(f"{s} {x:>10.4f} {y:>10.4f} {z:>10.4f}\n")
+        return "".join(res)
 
     def get_bond_length(self, b: Bond):
-        i1, i2 = self.atoms.index(b.a1), self.atoms.index(b.a2)
+        i1, i2 = self._atom_index(b.a1), self._atom_index(b.a2)
         return self.geom.get_distance(i1, i2)
 
     def get_angle(self, a1: Atom, a2: Atom, a3: Atom):
@@ -397,10 +633,16 @@ class Molecule:
         Get bonds that match the atom symbols
         b_type is a string of type "Cs-Br"
         """
+        # symbol pairs are compared in sorted order, same as comparing them as sets
+        keys = [
+            (s1, s2) if s1 <= s2 else (s2, s1)
+            for s1, s2 in ((b.a1.symbol, b.a2.symbol) for b in self.bonds)
+        ]
+
         for bt in b_types:
-            as1, as2 = bt.split("-")
-            for b in self.bonds:
-                if {as1, as2} == {b.a1.symbol, b.a2.symbol}:
+            target = tuple(sorted(bt.split("-")))
+            for b, k in zip(self.bonds, keys):
+                if k == target:
                     yield b
 
     def fix_geom(
@@ -410,15 +652,24 @@ class Molecule:
         Rescale geometry so that the average length of bonds with selected labels is equal to dist.
         Also, translate the geometry to the geometric center if center == True
         """
-        dists = []
-        for b in self.bonds:
-            if set((s1, s2)) == set((b.a1.symbol, b.a2.symbol)):
-                dists.append(self.get_bond_length(b))
+        bidx = np.array(
+            [(self._atom_index(b.a1), self._atom_index(b.a2)) for b in self.bonds],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+        syms = np.array(
+            [(b.a1.symbol, b.a2.symbol) for b in self.bonds], dtype=object
+        ).reshape(-1, 2)
+
+        mask = ((syms[:, 0] == s1) & (syms[:, 1] == s2)) | (
+            (syms[:, 0] == s2) & (syms[:, 1] == s1)
+        )
 
-        if len(dists) == 0:
+        if not np.any(mask):
             # Emergency scenario: just average the bond lengths what we already have
-            for b in self.bonds:
-                dists.append(self.get_bond_length(b))
+            mask[:] = True
+
+        coord = self.geom.coord
+        dists = np.linalg.norm(coord[bidx[mask, 0]] - coord[bidx[mask, 1]], axis=1)
 
         factor = dist / np.average(dists)
         self.geom.scale(factor)
@@ -430,45 +681,60 @@ class Molecule:
         """
         Return a .mol2 block
         """
-        mol2 = f"@<TRIPOS>MOLECULE\n{self.name}\n{len(self.atoms)} {len(self.bonds)} 0 0 0\nSMALL\nGASTEIGER\n\n"
-
-        mol2 += "@<TRIPOS>ATOM"
-        for i, a in enumerate(self.atoms):
-            x, y, z = self.geom.coord[i]
-            mol2 += f"\n{i+1:>6} {a.label:<3} {x:>10.4f} {y:>10.4f} {z:>10.4f} {a.atom_type:<10} 1 {a.label if a.ap else 'UNL1'} 0.0"
+        return _format_mol2(self.name, self._mol2_topology(), self.geom.coord)
 
-        mol2 += "\n@<TRIPOS>BOND"
-        for i, b in enumerate(self.bonds):
-            a1, a2 = self.atoms.index(b.a1), self.atoms.index(b.a2)
-            mol2 += f"\n{i+1:>6} {a1+1:>6} {a2+1:>6} {b.bond_type:>10}"
+    def _mol2_topology(self):
+        """
+        Parts of the mol2 block that do not depend on the geometry:
+        (number of atoms, number of bonds, [(atom line prefix, atom line suffix), ...], bond block)
+        """
+        atom_parts = [
+            (
+                f"\n{i+1:>6} {a.label:<3} ",
+                f" {a.atom_type:<10} 1 {a.label if a.ap else 'UNL1'} 0.0",
+            )
+            for i, a in enumerate(self.atoms)
+        ]
 
-        mol2 += "\n\n"
+        bond_block = "".join(
+            f"\n{i+1:>6} {self._atom_index(b.a1)+1:>6} {self._atom_index(b.a2)+1:>6} {b.bond_type:>10}"
+            for i, b in enumerate(self.bonds)
+        )
 
-        return mol2
+        return len(self.atoms), len(self.bonds), atom_parts, bond_block
 
-    def embed_conformers(self, *confs: CartesianGeometry, mode="a"):
+    def embed_conformers(self, *confs: CartesianGeometry, mode="a", copy: bool = True):
         """
         This function embeds alternative geometries (conformers)
+        Conformers can also be given as a single (n_confs, n_atoms, 3) coordinate array
         if mode == 'a': append conformers to existing list
         if mode == 'w': overwrite the list of conformers
+        if copy == False: geometry objects are embedded as they are (use when the caller owns them)
         """
+        if len(confs) == 1 and isinstance(confs[0], np.ndarray):
+            if confs[0].ndim != 3 or confs[0].shape[1:] != (len(self.atoms), 3):
+                raise ValueError(
+                    f"Expected an array of shape (n_confs, {len(self.atoms)}, 3), got {confs[0].shape}"
+                )
+            # new geometry objects, no need to copy them
+            confs = [CartesianGeometry(coord) for coord in confs[0]]
+        elif copy:
+            confs = [c.copy() for c in confs]
+        else:
+            confs = list(confs)
+
         if mode == "a":
-            self.conformers.extend(deepcopy(confs))
+            self.conformers.extend(confs)
         elif mode == "w":
-            self.conformers = deepcopy(confs)
+            self.conformers = confs
         else:
             raise ValueError("Mode can only be 'w' or 'a'")
 
     def confs_to_multixyz(self):
-        labels = [x.symbol for x in self.atoms]
-        allxyz = ""
-        for i, conf in enumerate(self.conformers):
-            xyz = conf.to_xyz(labels, f"{self.name}:{i+1}")
-            allxyz += xyz
-        return allxyz
+        return "".join(self.confs_to_xyzs())
 
     def confs_to_xyzs(self):
-        labels = [x.symbol for x in self.atoms]
+        labels = self.symbols
         allxyz = []
         for i, conf in enumerate(self.conformers):
             xyz = conf.to_xyz(labels, f"{self.name}:{i+1}")
@@ -484,7 +750,15 @@ class Molecule:
 
         return mols
 
-    def confs_to_mol2_files(self, path="", name_fmt="{name}_cf{n}"):
+    def yield_confs_mol2(self, name_fmt="{name}_cf{n}"):
+        """
+        Yields mol2 blocks of all conformers one at a time (same as to_mol2 of confs_to_molecules(), without building the molecules)
+        """
+        topology = self._mol2_topology()
+        for cn, cg in enumerate(self.conformers):
+            yield _format_mol2(name_fmt.format(name=self.name, n=cn), topology, cg.coord)
+
+    def confs_to_mol2_files(self, path="", name_fmt="{name}_cf{n}", nprocs: int = 8):
         """
         This function exports all conformers from current molecule file into mol2 files.
 
@@ -495,18 +769,27 @@ class Molecule:
             - `{name}`: molecule name
             - `{n}`: conformer number (conformers will be numcered starting with 0)
 
+        `nprocs`: number of threads that write the files (file writes overlap, formatting does not)
+
         """
         # check if the folder exists and create if needed
         if not os.path.isdir(path):
             os.makedirs(path)
 
         if self.conformers:
-            for m in self.confs_to_molecules(name_fmt=name_fmt):
-
-                fn = os.path.normpath(os.path.join(path, f"{m.name}.mol2"))
-
-                with open(fn, "wt") as f:
-                    f.write(m.to_mol2())
+            # labels, atom types and bonds are the same for all conformers: they are formatted once
+            write = partial(_write_mol2, path, self._mol2_topology())
+            items = [
+                (name_fmt.format(name=self.name, n=cn), cg.coord)
+                for cn, cg in enumerate(self.conformers)
+            ]
+
+            if nprocs > 1 and len(items) > 1:
+                with ThreadPoolExecutor(max_workers=nprocs) as ex:
+                    # consuming the results re-raises errors from the workers
+                    list(ex.map(write, items))
+            else:
+                list(map(write, items))
         else:
             print(f"{self.name}: no conformers to export")
 
@@ -515,16 +798,30 @@ class Molecule:
         Remove selected atoms from the molecule.
         Also deletes all bonds to and between selected atoms, and the respective coordinates.
         """
-        for a in atoms:
-            for b in self.get_bonds_with_atom(a):
-                self.bonds.remove(b)
-
-            aidx = self.get_atom_idx(a)
-            self.geom.delete(aidx)
-            for conf in self.conformers:
-                conf.delete(aidx)
-
-            self.atoms.remove(a)
+        # all indices are resolved before anything is deleted, so that coordinates are only reallocated once
+        idx = sorted({self.get_atom_idx(a) for a in atoms})
+        removed = {self.atoms[i] for i in idx}
+
+        # bond list and atom list are filtered in place
+        adj = self._adjacency(build=False)
+        self.bonds[:] = [
+            b for b in self.bonds if b.a1 not in removed and b.a2 not in removed
+        ]
+
+        # the adjacency map, if there is one, loses the removed atoms and their bonds
+        if adj is not None:
+            for a in removed:
+                for b in adj.pop(a, ()):
+                    other = b.a2 if b.a1 is a else b.a1
+                    if other not in removed and other in adj:
+                        adj[other] = [x for x in adj[other] if x is not b]
+            self._adj_key = self._bonds_key()
+
+        self.geom.delete_many(idx)
+        for conf in self.conformers:
+            conf.delete_many(idx)
+
+        self.atoms[:] = [a for a in self.atoms if a not in removed]
 
     @classmethod
     def join(
@@ -540,69 +837,88 @@ class Molecule:
         """
         Join two molecular fragments with bond a11--a21, delete atoms a12 and a22
         """
+        m1._check_join_side(a12)
+        m2._check_join_side(a22)
+
+        return cls._join_sides(
+            m1, m2, a11, a12, a21, a22, m1._join_side(a11, a12), dist=dist
+        )
 
-        if m1.has_confomers() or m2.has_confomers():
+    def _check_join_side(self, a2: Atom):
+        """
+        Pre-flight checks for joining at attachment atom a2
+        """
+        if self.has_confomers():
             # TODO: implement conformer joining, because that could be pretty powerful
             raise NotImplementedError("Currently conformer joining is not supported")
 
-        ## Pre-flight checks
-        if not len(_bm1 := m1.get_bonds_with_atom(a12)) == 1:
-            raise SyntaxError(
-                f"Attachment poing should only have one bond, found {len(_bm1)}"
-            )
-        if not len(_bm2 := m2.get_bonds_with_atom(a22)) == 1:
+        if not len(_bm := self.get_bonds_with_atom(a2)) == 1:
             raise SyntaxError(
-                f"Attachment poing should only have one bond, found {len(_bm1)}"
+                f"Attachment poing should only have one bond, found {len(_bm)}"
             )
 
-        ## STEP 1. Determine the rotation matrix.
-        #   In this algorithm, we rotate `m2`
+    def _join_side(self, a1: Atom, a2: Atom):
+        """
+        Attachment vector a1->a2, and the coordinates shifted so that a1 is at the origin (a2 is left out)
+        """
+        i1 = self._atom_index(a1)
+        i2 = self._atom_index(a2)
+        coord = self.geom.coord
 
-        i11 = m1.atoms.index(a11)
-        i12 = m1.atoms.index(a12)
-        i21 = m2.atoms.index(a21)
-        i22 = m2.atoms.index(a22)
+        keep = np.arange(len(coord)) != i2
+        return coord[i2] - coord[i1], coord[keep] - coord[i1]
 
-        v1 = m1.geom.coord[i12] - m1.geom.coord[i11]
-        v2 = m2.geom.coord[i22] - m2.geom.coord[i21]
+    @classmethod
+    def _join_sides(
+        cls,
+        m1: Molecule,
+        m2: Molecule,
+        a11: Atom,
+        a12: Atom,
+        a21: Atom,
+        a22: Atom,
+        side1: tuple,
+        dist: float = 10.0,
+    ):
+        """
+        Actual joining. `side1` is m1._join_side(a11, a12), which does not depend on m2
+        """
+        ## STEP 1. Determine the rotation matrix.
+        #   In this algorithm, we rotate `m2`
+        v1, c1 = side1
+        v2, c2 = m2._join_side(a21, a22)
 
         R = rotation_matrix(v2, -v1)
 
         ## STEP 2. Transform and translate a copy of geom-2
-        g1 = deepcopy(m1.geom)
-        g2 = deepcopy(m2.geom)
-
-        g1.set_origin(i11)
-        g2.set_origin(i21)
-
-        g2.transform(R)
+        #   (operates on new coordinate arrays, the original geometries are not touched)
+        #   attachment atoms a12 and a22 are already left out
+        c2 = c2 @ R
 
         # vT = (v1 * (dist - np.linalg.norm(v1) - np.linalg.norm(v2)) /
         #   np.linalg.norm(v1))
 
         vT = v1 * dist / np.linalg.norm(v1)
-        g2.translate(vT)
+        c2 += vT
 
         ## STEP 3. Start assembling the new class
-        g1.delete(i12)
-        g2.delete(i22)
 
         name = f"{m1.name}_{m2.name}"
-        atoms = []
-        bonds = []
 
         m1_atoms, m1_bonds, m1_map = structure_clone(m1.atoms, m1.bonds)
         m2_atoms, m2_bonds, m2_map = structure_clone(m2.atoms, m2.bonds)
 
-        for a in m1_atoms + m2_atoms:
-            if not a in (m1_map[a12], m2_map[a22]):
-                atoms.append(a)
+        # atoms hash by identity, so these are plain set lookups
+        drop = {m1_map[a12], m2_map[a22]}
 
-        for b in m1_bonds + m2_bonds:
-            if (m2_map[a22] not in b) and (m1_map[a12] not in b):
-                bonds.append(b)
+        atoms = [a for a in m1_atoms + m2_atoms if a not in drop]
+        bonds = [
+            b
+            for b in m1_bonds + m2_bonds
+            if b.a1 not in drop and b.a2 not in drop
+        ]
 
-        geom = np.concatenate((g1.coord, g2.coord), axis=0)
+        geom = np.concatenate((c1, c2), axis=0)
 
         result = cls(name=name, atoms=atoms, bonds=bonds, geom=CartesianGeometry(geom))
         result.add_bond(m1_map[a11], m2_map[a21])
@@ -610,6 +926,22 @@ class Molecule:
 
         return result
 
+    def _get_ap(self, ap: str):
+        """
+        Returns (atom bonded to the attachment point, attachment point atom)
+        """
+        a2 = self.get_atom(ap)
+        bonds = self.get_bonds_with_atom(a2)
+
+        assert (
+            len(bonds) == 1
+        ), f"Doesn't look like {ap} is an attachment point: {len(bonds)} bonds"
+
+        b = bonds[0]
+        a1 = b.a1 if b.a2 == a2 else b.a2
+
+        return a1, a2
+
     @classmethod
     def join_ap(
         cls,
@@ -622,27 +954,37 @@ class Molecule:
         """
         Join two molecules at the attachment points. Attachment points are defined as atoms with distinct labels, such as A0.
         """
+        a11, a12 = m1._get_ap(ap1)
+        a21, a22 = m2._get_ap(ap2)
 
-        a12 = m1.get_atom(ap1)
-        a22 = m2.get_atom(ap2)
-
-        bonds1 = m1.get_bonds_with_atom(a12)
-        bonds2 = m2.get_bonds_with_atom(a22)
-
-        assert (
-            len(bonds1) == 1
-        ), f"Doesn't look like ap1 is an attachment point: {len(bonds1)} bonds"
-        assert (
-            len(bonds2) == 1
-        ), f"Doesn't look like ap2 is an attachment point: {len(bonds2)} bonds"
-
-        b1 = bonds1[0]
-        b2 = bonds2[0]
+        return cls.join(m1, m2, a11, a12, a21, a22, dist=dist)
 
-        a11 = b1.a1 if b1.a2 == a12 else b1.a2
-        a21 = b2.a1 if b2.a2 == a22 else b2.a2
+    @classmethod
+    def join_batch(
+        cls,
+        m1: Molecule,
+        m2s: Iterable[Molecule],
+        ap1: str = "A0",
+        ap2: str = "A1",
+        dist: float = 10.0,
+    ) -> List[Molecule]:
+        """
+        Same as [join_ap(m1, m2, ...) for m2 in m2s], but everything that only depends on m1
+        (attachment point lookup, checks, shifted coordinates) is done once
+        """
+        a11, a12 = m1._get_ap(ap1)
+        m1._check_join_side(a12)
+        side1 = m1._join_side(a11, a12)
+
+        result = []
+        for m2 in m2s:
+            a21, a22 = m2._get_ap(ap2)
+            m2._check_join_side(a22)
+            result.append(
+                cls._join_sides(m1, m2, a11, a12, a21, a22, side1, dist=dist)
+            )
 
-        return cls.join(m1, m2, a11, a12, a21, a22, dist=dist)
+        return result
 
     @classmethod
     def _get_join_ap_fx(cls, ap1, ap2, dist):
@@ -655,113 +997,140 @@ class Molecule:
         """
         Get the rectangular space that encompasses all atoms in all conformers
         """
-        mins = []
-        maxs = []
+        if not self.conformers:
+            raise ValueError(f"{self.name}: bounding box requires conformers")
 
-        for g in self.conformers:
-            rmin, rmax = g.bounding_box()
-            mins.append(rmin)
-            maxs.append(rmax)
+        # (n_confs, n_atoms, 3): a single reduction over contiguous memory
+        coords = np.stack([g.coord for g in self.conformers])
 
-        rmin = np.min(mins, axis=(0,))
-        rmax = np.max(maxs, axis=(0,))
-
-        return rmin, rmax
+        return coords.min(axis=(0, 1)), coords.max(axis=(0, 1))
 
     def to_xml(self, pretty=True):
         """
         Save the molecule object in an xml format
         """
+        return "".join(self._xml_chunks(pretty))
 
-        xdoc = xmd.Document()
+    def write_xml(self, f: IOBase, pretty=True):
+        """
+        Write the molecule object in an xml format directly into a text or binary (utf8) stream,
+        without assembling the whole xml string in memory first. Output is identical to `to_xml`
+        """
+        if isinstance(f, TextIOBase):
+            f.writelines(self._xml_chunks(pretty))
+        else:
+            tf = TextIOWrapper(f, encoding="utf8", write_through=True)
+            tf.writelines(self._xml_chunks(pretty))
+            tf.flush()
+            tf.detach()
 
-        xdoc.appendChild(xdoc.createComment("MOLLI PACKAGE EXPERIMENTAL XML FORMAT"))
+    def _xml_chunks(self, pretty=True):
+        """
+        Yield the xml representation of the molecule section by section.
+        The layout is the same as minidom's toprettyxml() / toxml() of the molli xml schema
+        """
+        t, n = ("\t", "\n") if pretty else ("", "")
 
-        xmol = xdoc.createElement("molecule")
-        xmol.setAttribute("name", self.name)
-        xdoc.appendChild(xmol)
-        xatoms = xdoc.createElement("atoms")
-        xbonds = xdoc.createElement("bonds")
-        xgeom = xdoc.createElement("geometry")
-        xconfs = xdoc.createElement("conformers")
-        xprops = xdoc.createElement("properties")
+        def section(tag: str, items: List[str]):
+            if items:
+                return f"{t}<{tag}>{n}" + "".join(items) + f"{t}</{tag}>{n}"
+            else:
+                return f"{t}<{tag}/>{n}"
 
-        for x in xatoms, xbonds, xgeom, xconfs, xprops:
-            xmol.appendChild(x)
+        yield f'<?xml version="1.0" ?>{n}<!--MOLLI PACKAGE EXPERIMENTAL XML FORMAT-->{n}'
+        yield f'<molecule name="{_xml_escape(self.name)}">{n}'
 
         ids = {}
+        xatoms = []
         for i, a in enumerate(self.atoms):
-            xa = xdoc.createElement("a")
-            xa.setAttribute("id", f"{i+1}")
-            xa.setAttribute("s", a.symbol)
-            xa.setAttribute("t", a.atom_type)
-            xa.setAttribute("l", a.label)
             ids[a] = f"{i+1}"
-            xatoms.appendChild(xa)
-
-        for i, b in enumerate(self.bonds):
-            xb = xdoc.createElement("b")
-            xb.setAttribute("id", f"{i+1}")
+            xatoms.append(
+                f'{t}{t}<a id="{i+1}" s="{_xml_escape(a.symbol)}" t="{_xml_escape(a.atom_type)}" l="{_xml_escape(a.label)}"/>{n}'
+            )
+        yield section("atoms", xatoms)
 
-            id1, id2 = ids[b.a1], ids[b.a2]
-            xb.setAttribute("c", f"{id1} {id2}")
-            xb.setAttribute("t", b.bond_type)
+        xbonds = [
+            f'{t}{t}<b id="{i+1}" c="{ids[b.a1]} {ids[b.a2]}" t="{_xml_escape(b.bond_type)}"/>{n}'
+            for i, b in enumerate(self.bonds)
+        ]
+        yield section("bonds", xbonds)
 
-            xbonds.appendChild(xb)
+        yield section(
+            "geometry",
+            [f'{t}{t}<g u="A" t="cart/3d">{self.geom.dumps()}</g>{n}'],
+        )
 
-        xg0 = xdoc.createElement("g")
-        xg0.setAttribute("u", "A")
-        xg0.setAttribute("t", "cart/3d")
-        xg0.appendChild(xdoc.createTextNode(self.geom.dumps()))
-        xgeom.appendChild(xg0)
+        xconfs = [
+            f'{t}{t}<g id="{i+1}" u="A" t="cart/3d">{conf.dumps()}</g>{n}'
+            for i, conf in enumerate(self.conformers)
+        ]
+        yield section("conformers", xconfs)
 
-        for i, conf in enumerate(self.conformers):
-            cg = xdoc.createElement("g")
-            cg.setAttribute("id", f"{i+1}")
-            cg.setAttribute("u", "A")
-            cg.setAttribute("t", "cart/3d")
-            cg.appendChild(xdoc.createTextNode(conf.dumps()))
-            xconfs.appendChild(cg)
-
-        if pretty:
-            return xdoc.toprettyxml()
-        else:
-            return xdoc.toxml()
+        yield section("properties", [])
+        yield f"</molecule>{n}"
 
     @classmethod
-    def from_xml(cls, fp: str) -> Molecule:
+    def from_xml(cls, fp: str | os.PathLike | IOBase) -> Molecule:
         """
         Parse a molli xml file and create a Molecule instance
         """
-        et = xparse(fp)
-        # rt = et.getroot()
+        if isinstance(fp, (str, os.PathLike)):
+            with open(fp, "rb") as f:
+                return cls._from_xml_events(_xml_events(_read_chunks(f)))
+        else:
+            return cls._from_xml_events(_xml_events(_read_chunks(fp)))
 
-        mol = et.getroot()
-        name = mol.attrib["name"]
+    @classmethod
+    def from_xml_bytes(cls, data: bytes | str) -> Molecule:
+        """
+        Create a Molecule instance from the contents of a molli xml file (e.g. a zip archive member read in one go)
+        """
+        return cls._from_xml_events(_xml_events((data,)))
 
-        xatoms = mol.findall("./atoms/a")
-        xbonds = mol.findall("./bonds/b")
-        xgeom = mol.find("./geometry/g")
-        xconfs = mol.findall("./conformers/g")
-        # xprops = mol.findall("./properties/p")  # not really implemented yet
+    @classmethod
+    def _from_xml_events(cls, events) -> Molecule:
+        """
+        Create a Molecule instance in a single pass over (event, element) pairs of a molli xml document.
+        Elements are dispatched on their tag and cleared as soon as they are consumed.
+        """
+        name = None
+        section = None
 
         atoms = []
-        ids = []
+        ids = {}
         bonds = []
+        geom = None
         conformers = []
 
-        for a in xatoms:
-            aid, s, l, at = a.attrib["id"], a.attrib["s"], a.attrib["l"], a.attrib["t"]
-            ids.append(aid)
-            atoms.append(Atom(s, l, at))
+        for ev, el in events:
+            tag = el.tag
+
+            if ev == "start":
+                if tag == "molecule":
+                    name = el.attrib["name"]
+                elif tag in ("geometry", "conformers"):
+                    section = tag
+                continue
 
-        for b in xbonds:
-            ia1, ia2 = map(ids.index, b.attrib["c"].split())
-            bt = b.attrib["t"]
-            bonds.append(Bond(atoms[ia1], atoms[ia2], bt))
+            if tag == "a":
+                a = Atom(el.attrib["s"], el.attrib["l"], el.attrib["t"])
+                # first occurrence of an id wins (same as list.index)
+                ids.setdefault(el.attrib["id"], a)
+                atoms.append(a)
+            elif tag == "b":
+                p1, p2 = el.attrib["c"].split()
+                bonds.append(Bond(ids[p1], ids[p2], el.attrib["t"]))
+            elif tag == "g" and section == "geometry":
+                geom = CartesianGeometry.from_str(el.text)
+            elif tag == "g" and section == "conformers":
+                conformers.append(CartesianGeometry.from_str(el.text))
+            elif tag == "molecule":
+                continue
+            # <properties/> are not really implemented yet
 
-        geom = CartesianGeometry.from_str(xgeom.text)
-        conformers = [CartesianGeometry.from_str(g.text) for g in xconfs]
+            # consumed elements are emptied; closing a section also detaches its (emptied) children,
+            # so the root does not accumulate one element per atom / bond / conformer
+            el.clear()
 
         return cls(name, atoms=atoms, bonds=bonds, geom=geom, conformers=conformers)
 
@@ -0,0 +1,84 @@
+"""
+    Compiled parser for the coordinate columns of xyz blocks (parse_coords is None without numba)
+"""
+import numpy as np
+
+from .._jit import njit, HAS_NUMBA
+
+# powers of ten that are exactly representable as doubles
+_POW10 = np.array([float(10**k) for k in range(23)])
+
+
+def _parse_coords(buf: np.ndarray, out: np.ndarray, pow10: np.ndarray) -> bool:
+    """
+    buf: ascii bytes (uint8) of xyz atom lines: `symbol x y z`
+    out: (n, 3) float64 array that receives the coordinates
+
+    Only plain decimals with up to 15 digits are accepted: for these mantissa / 10^k is exact,
+    so the result is the same as that of float(). Returns False as soon as anything else is found
+    (exponents, extra columns, ...), in which case the caller is expected to parse the block otherwise.
+    """
+    i = 0
+    L = len(buf)
+
+    for row in range(out.shape[0]):
+        # symbol
+        while i < L and buf[i] <= 32:
+            i += 1
+        while i < L and buf[i] > 32:
+            i += 1
+
+        for col in range(3):
+            while i < L and (buf[i] == 32 or buf[i] == 9):
+                i += 1
+
+            neg = False
+            if i < L and (buf[i] == 45 or buf[i] == 43):
+                neg = buf[i] == 45
+                i += 1
+
+            mant = 0
+            ndig = 0
+            frac = 0
+            dot = False
+            while i < L:
+                c = buf[i]
+                if 48 <= c <= 57:
+                    mant = mant * 10 + (int(c) - 48)
+                    ndig += 1
+                    if dot:
+                        frac += 1
+                elif c == 46 and not dot:
+                    dot = True
+                else:
+                    break
+                i += 1
+
+            if ndig == 0 or ndig > 15 or (i < L and buf[i] > 32):
+                return False
+
+            v = mant / pow10[frac]
+            out[row, col] = -v if neg else v
+
+        # end of line
+        while i < L and (buf[i] == 32 or buf[i] == 9 or buf[i] == 13):
+            i += 1
+        if i < L and buf[i] != 10:
+            return False
+
+    return True
+
+
+if HAS_NUMBA:
+    _parse_coords_jit = njit(cache=True)(_parse_coords)
+
+    def parse_coords(lines, n: int):
+        """
+        Parse the coordinates of `n` xyz atom lines, returns a (n, 3) array or None if the compiled parser declined
+        """
+        buf = np.frombuffer("\n".join(lines).encode(), dtype=np.uint8)
+        out = np.empty((n, 3))
+        return out if _parse_coords_jit(buf, out, _POW10) else None
+
+else:
+    parse_coords = None
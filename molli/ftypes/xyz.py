@@ -3,6 +3,10 @@
 """
 from typing import List
 import numpy as np
+from ._xyz_jit import parse_coords
+
+# blocks with fewer atoms are not worth handing over to the compiled parser (if numba is available)
+JIT_MIN_ATOMS = 200
 
 
 def split_xyz(xyzblock: str) -> List[List[str]]:
@@ -34,17 +38,51 @@ def parse_xyz_lines(xyzlines: List[str]) -> (np.ndarray, List[str], str):
 
     comment = _lines[1]
 
-    atoms = []
-    coord = np.zeros((L, 3))
+    body = _lines[2:]
+    atoms = [l.split(maxsplit=1)[0] for l in body]
+
+    coord = None
+    if parse_coords is not None and L >= JIT_MIN_ATOMS:
+        coord = parse_coords(body, L)
 
-    for i, l in enumerate(_lines[2:]):
-        a, x, y, z = l.split()
-        atoms.append(a)
-        coord[i] = [float(x), float(y), float(z)]
+    if coord is None and L:
+        # coordinates are converted by numpy in one go
+        coord = np.loadtxt(body, usecols=(1, 2, 3), ndmin=2)
+    elif coord is None:
+        coord = np.zeros((0, 3))
 
     return coord, atoms, comment
 
 
+def read_last_xyz_block(path: str, chunk_size: int = 65536) -> str:
+    """
+    Retrieve the last xyz block of a (potentially huge) multixyz file, such as xtbopt.log
+    The file is read backwards in chunks until the last frame header is located,
+    so only the tail of the file is ever loaded and parsed.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        pos = f.tell()
+        buf = b""
+
+        while pos > 0:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+
+            lines = buf.rstrip().splitlines()
+            # The first line of the buffer may be truncated, unless we hit the beginning of the file
+            first = 0 if pos == 0 else 1
+
+            for i in range(len(lines) - 2, first - 1, -1):
+                hdr = lines[i].strip()
+                if hdr.isdigit() and i + int(hdr) + 2 == len(lines):
+                    return b"\n".join(lines[i:]).decode() + "\n"
+
+    raise SyntaxError(f"No valid xyz blocks found in {path}")
+
+
 def parse_xyz(xyzblock: str, single: bool = True, assert_single: bool = False):
     """
     Note that single will return the first block always.
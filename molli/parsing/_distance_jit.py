@@ -0,0 +1,37 @@
+"""
+    Nearest label lookup for cdxml fragments: closest point of one 2d point set for every point of another
+"""
+import numpy as np
+
+from .._jit import njit, prange, HAS_NUMBA
+
+
+def _argmin_pairwise_sq(c, l):
+    # one fused loop per point: no (F, L) intermediate. strict comparison keeps the first minimum, as np.argmin
+    out = np.empty(c.shape[0], np.int64)
+    for i in prange(c.shape[0]):
+        best = np.inf
+        bj = 0
+        for j in range(l.shape[0]):
+            dx = c[i, 0] - l[j, 0]
+            dy = c[i, 1] - l[j, 1]
+            d = dx * dx + dy * dy
+            if d < best:
+                best = d
+                bj = j
+        out[i] = bj
+    return out
+
+
+if HAS_NUMBA:
+    argmin_pairwise_sq = njit(parallel=True, cache=True)(_argmin_pairwise_sq)
+
+else:
+
+    def argmin_pairwise_sq(c: np.ndarray, l: np.ndarray):
+        """
+        Index of the closest point of `l` (L, 2) for every point of `c` (F, 2)
+        """
+        # squared distances have the same minimum
+        diff = c[:, None, :] - l[None, :, :]
+        return np.argmin(np.einsum("fli,fli->fl", diff, diff), axis=1)
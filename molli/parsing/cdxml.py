@@ -1,44 +1,206 @@
 from ..dtypes import Molecule, Atom, Bond, CartesianGeometry, Collection
+from ._distance_jit import argmin_pairwise_sq
 from typing import List
 from xml.etree import cElementTree as et
 import os
 import numpy as np
 import os
 import re
+import math
+
+
+# z-coordinate hints from the stereo display of a bond: Display -> (target end, reference end, sign)
+# (0 = beginning of the bond, 1 = end of the bond)
+# target = reference + sign * ZSC * BondLength, if there is no reference both ends are set to sign * ZSC * BondLength
+ZSC = -1
+DISPLAY_Z = {
+    "WedgeBegin": (1, 0, 1),
+    "WedgedHashBegin": (1, 0, -1),
+    "WedgeEnd": (0, 1, 1),
+    "WedgedHashEnd": (0, 1, -1),
+    "Bold": (None, None, 1),
+    "Hashed": (None, None, -1),
+}
+
+# atom labels with implicit hydrogens are reduced to the heavy atom
+_SUB_MAP = {"NH2": "N", "NH": "N", "OH": "O"}
+_SUB_RE = re.compile("|".join(map(re.escape, _SUB_MAP)))
+
+
+def _sub_label(m: re.Match):
+    return _SUB_MAP[m.group(0)]
 
 
 def parse_pos(p: str):
+    # for the few numbers of a BoundingBox this is ~3x faster than np.fromstring (node positions are parsed in bulk)
     return list(map(float, p.split()))
 
 
-def dist(a, b):
-    return np.sqrt(np.sum((np.array(a) - np.array(b)) ** 2))
+# for scalar calls
+dist = math.dist
 
+# above this number of labels the nearest label is looked up with a k-d tree instead of a dense distance matrix
+KDTREE_MIN_LABELS = 10000
 
-def split_cdxml(file_path: str, enum=False, fmt="m{idx}") -> Collection:
+
+def nearest_labels(centroids: np.ndarray, label_coord: np.ndarray) -> np.ndarray:
     """
-    Split a single cdxml file into a collection of molecules
+    Index of the closest label for every centroid: (F, 2), (L, 2) -> (F,)
     """
+    if len(label_coord) > KDTREE_MIN_LABELS:
+        from scipy.spatial import cKDTree
 
-    name = os.path.basename(file_path).rsplit(".")[0]
+        return cKDTree(label_coord).query(centroids)[1]
 
-    with open(file_path) as f:
-        xml = et.parse(f)
+    # compiled loop if numba is available, dense numpy distance matrix otherwise
+    return argmin_pairwise_sq(centroids, label_coord)
 
-    rt = xml.getroot()
 
-    # =======================================
-    zu = float(rt.attrib["BondLength"])
+def _parse_fragment(frag, zu: float):
+    """
+    Convert a single (outermost) fragment element into atoms, bonds and 2d geometry with z hints
+    Returns the centroid of the fragment bounding box, atoms, bonds, geometry
+    """
+    l, t, r, b = parse_pos(frag.attrib["BoundingBox"])
+    frag_centroid = [(r + l) / 2, (b + t) / 2]
+
+    atoms = []
+    atom_ids = {}
+    bonds = []
+    # bond_ids = []
+    nodes = frag.findall("./n")
+    # 2d positions of all nodes are parsed in one go; z is only set by stereo hints below
+    geom = np.zeros((len(nodes), 3))
+    if nodes:
+        geom[:, :2] = np.fromstring(
+            " ".join([n.attrib["p"] for n in nodes]), sep=" "
+        ).reshape(len(nodes), 2)
+
+    geom_hint_nodes = {}  # atom id -> symbol
+    atom_id_to_text = {}
+
+    # Iterate over nodes
+    for i, n in enumerate(nodes):  # pylint: disable=unused-variable
+        atom_id = n.attrib["id"]
+        a = n.find("./t/s")
+        atom_id_to_text[atom_id] = a
+        if a == None:
+            atom = Atom("C", "C", "C")
+        else:
+            # a != None:
+            # print(a.text)
+            # print(a.text.replace("NH2", "N").replace("NH", "N").replace("OH", "O"))
+            text = a.text
+            sym = _SUB_RE.sub(_sub_label, text)
+            atom = Atom(sym, sym, sym)
+            if text in ["S", "P"]:
+                geom_hint_nodes[atom_id] = text
+        # elif a != None and a.text[0] == "#": ##This seems like a weirdly specific bug fix
+        #     atom = Atom("Cl", a.text[1:], "Cl", ap=True)
+        # elif a != None and 'H' in a.text[0]
+        # else:
+        #     atom = Atom(a.text, a.text, a.text)
+
+        # first occurrence of an id wins (same as list.index)
+        atom_ids.setdefault(atom_id, len(atoms))
+        atoms.append(atom)
+
+    # Iterate over bonds
+    dz0 = ZSC * zu
+    for b in frag.findall("./b"):
+        attrib = b.attrib
+        id1, id2 = attrib["B"], attrib["E"]
+        f = atom_ids[id1], atom_ids[id2]
+        bt = attrib.get("Order", "1")
+        disp = attrib.get("Display")
+
+        # ==========================================================
+        #      If the bond contains stereochemical indication:
+        #           Add z-coordinate hints
+        # ==========================================================
+
+        # ==========================================================
+        #   Add exceptions here to give "hints" for hypervalent
+        #           main-group structure parsing.
+        # ==========================================================
+        # Only runs if hints were found; should be sparse
+        if id1 in geom_hint_nodes:  # Check if the bond begins at hint atom
+            if (
+                atom_id_to_text[id2] != None and atom_id_to_text[id2].text == "O"
+            ):  # If the partner is an oxygen, add wedge
+                disp = "WedgeBegin"
+                del geom_hint_nodes[id1]  # Only want one execution per hint
+                print("found start S")
+        elif id2 in geom_hint_nodes:  # Check if the bond ends at a hint atom
+            if (
+                atom_id_to_text[id1] != None and atom_id_to_text[id1].text == "O"
+            ):  # If the partner is an oxygen, add wedge
+                disp = "WedgeEnd"
+                del geom_hint_nodes[id2]
+                print("found end S")
+
+        if spec := DISPLAY_Z.get(disp):
+            dst, src, sign = spec
+            dz = sign * dz0
+
+            if src is None:
+                geom[f[0], 2] = geom[f[1], 2] = dz
+            else:
+                geom[f[dst], 2] = dz + geom[f[src], 2]
 
-    # Find all molecular fragments and text boxes
-    fragments = rt.findall(".//fragment")
+        bond = Bond(atoms[f[0]], atoms[f[1]], bt)
+        bonds.append(bond)
 
-    # So apparently chemdraw occasionally places fragments inside fragments...
-    # This makes sure that those don't get counted
-    for x in rt.findall(".//fragment//fragment"):
-        fragments.remove(x)
+    return frag_centroid, atoms, bonds, geom
 
-    textboxes = rt.findall("./*/t") + rt.findall("./*/group/t")
+
+def split_cdxml(file_path: str, enum=False, fmt="m{idx}") -> Collection:
+    """
+    Split a single cdxml file into a collection of molecules
+    """
+
+    name = os.path.basename(file_path).rsplit(".")[0]
+
+    # The document is streamed: every outermost fragment is converted as soon as it is closed and then discarded,
+    # so the full DOM is never held in memory
+    zu = None
+    path = []  # tags of the currently open elements
+    elems = []  # and the elements themselves
+    depth = 0  # fragment nesting depth
+    fragments = []
+
+    # text boxes that are children of top level elements (./*/t) or of groups within those (./*/group/t)
+    textboxes = []
+    group_textboxes = []
+
+    for event, el in et.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            if zu is None:
+                zu = float(el.attrib["BondLength"])
+            path.append(el.tag)
+            elems.append(el)
+            # So apparently chemdraw occasionally places fragments inside fragments...
+            # Only the outermost ones are counted
+            if el.tag == "fragment":
+                depth += 1
+            continue
+
+        if el.tag == "fragment":
+            depth -= 1
+            if not depth:
+                fragments.append(_parse_fragment(el, zu))
+                el.clear()
+                del elems[-2][:]
+        elif el.tag == "t" and not depth:
+            if len(path) == 3:
+                textboxes.append(el)
+            elif len(path) == 4 and path[2] == "group":
+                group_textboxes.append(el)
+
+        path.pop()
+        elems.pop()
+
+    textboxes += group_textboxes
 
     if not enum:
         assert len(fragments) <= len(
@@ -60,122 +222,21 @@ def split_cdxml(file_path: str, enum=False, fmt="m{idx}") -> Collection:
                 label_coord.append([(r + l) / 2, (b + t) / 2])
                 labels.append(tb.find("./s").text)
 
-    # Iterate over fragments
+        label_coord = np.asarray(label_coord, dtype=np.float64).reshape(-1, 2)
+
     # Convert 2d geometry to Molecule files
 
     molecules = []
 
-    for nf, frag in enumerate(fragments):
-
-        l, t, r, b = parse_pos(frag.attrib["BoundingBox"])
-        frag_centroid = [(r + l) / 2, (b + t) / 2]
-
-        atoms = []
-        atom_ids = []
-        bonds = []
-        # bond_ids = []
-        geom = []
-
-        geom_hint_nodes = []
-        atom_id_to_text = {}
-
-        # Iterate over nodes
-        for i, n in enumerate(frag.findall("./n")):  # pylint: disable=unused-variable
-            x, y = parse_pos(n.attrib["p"])
-            atom_id = n.attrib["id"]
-            a = n.find("./t/s")
-            atom_id_to_text[atom_id] = a
-            if a == None:
-                atom = Atom("C", "C", "C")
-            else:
-                # a != None:
-                # print(a.text)
-                # print(a.text.replace("NH2", "N").replace("NH", "N").replace("OH", "O"))
-                atom = Atom(
-                    a.text.replace("NH2", "N").replace("NH", "N").replace("OH", "O"),
-                    a.text.replace("NH2", "N").replace("NH", "N").replace("OH", "O"),
-                    a.text.replace("NH2", "N").replace("NH", "N").replace("OH", "O"),
-                )
-                if a.text in ["S", "P"]:
-                    geom_hint_nodes.append((a.text, atom_id))
-            # elif a != None and a.text[0] == "#": ##This seems like a weirdly specific bug fix
-            #     atom = Atom("Cl", a.text[1:], "Cl", ap=True)
-            # elif a != None and 'H' in a.text[0]
-            # else:
-            #     atom = Atom(a.text, a.text, a.text)
-
-            atoms.append(atom)
-            atom_ids.append(atom_id)
-
-            geom.append([x, y, 0.0])
-
-        # Iterate over bonds
-        for b in frag.findall("./b"):
-            id1, id2 = b.attrib["B"], b.attrib["E"]
-            bt = "1" if not "Order" in b.attrib else b.attrib["Order"]
-
-            # ==========================================================
-            #      If the bond contains stereochemical indication:
-            #           Add z-coordinate hints
-            # ==========================================================
-
-            # ==========================================================
-            #   Add exceptions here to give "hints" for hypervalent
-            #           main-group structure parsing.
-            # ==========================================================
-            for (
-                hint
-            ) in geom_hint_nodes:  # Only runs if hints were found; should be sparse
-                a, id = hint
-                if b.attrib["B"] == id:  # Check if the bond begins at hint atom
-                    if (
-                        atom_id_to_text[b.attrib["E"]] != None
-                        and atom_id_to_text[b.attrib["E"]].text == "O"
-                    ):  # If the partner is an oxygen, add wedge
-                        b.attrib["Display"] = "WedgeBegin"
-                        geom_hint_nodes.remove(hint)  # Only want one execution per hint
-                        print("found start S")
-                elif b.attrib["E"] == id:  # Check if the bond ends at a hint atom
-                    if (
-                        atom_id_to_text[b.attrib["B"]] != None
-                        and atom_id_to_text[b.attrib["B"]].text == "O"
-                    ):  # If the partner is an oxygen, add wedge
-                        b.attrib["Display"] = "WedgeEnd"
-                        geom_hint_nodes.remove(hint)
-                        print("found end S")
-
-            if "Display" in b.attrib:
-                f1, f2 = atom_ids.index(id1), atom_ids.index(id2)
-                ZSC = -1
-
-                if b.attrib["Display"] == "WedgeBegin":
-                    geom[f2][2] = ZSC * zu + geom[f1][2]
-
-                if b.attrib["Display"] == "WedgedHashBegin":
-                    geom[f2][2] = -ZSC * zu + geom[f1][2]
-
-                if b.attrib["Display"] == "WedgeEnd":
-                    geom[f1][2] = ZSC * zu + geom[f2][2]
-
-                if b.attrib["Display"] == "WedgedHashEnd":
-                    geom[f1][2] = -ZSC * zu + geom[f2][2]
-
-                if b.attrib["Display"] == "Bold":
-                    geom[f1][2] = ZSC * zu
-                    geom[f2][2] = ZSC * zu
-
-                if b.attrib["Display"] == "Hashed":
-                    geom[f1][2] = -ZSC * zu
-                    geom[f2][2] = -ZSC * zu
-
-            bond = Bond(atoms[atom_ids.index(id1)], atoms[atom_ids.index(id2)], bt)
-            bonds.append(bond)
+    if not enum and fragments:
+        centroids = np.array([f[0] for f in fragments], dtype=np.float64)
+        closest = nearest_labels(centroids, label_coord)
 
+    for nf, (frag_centroid, atoms, bonds, geom) in enumerate(fragments):
         if enum:
             mol_name = fmt.format(idx=nf)
         else:
-            closest = np.argmin([dist(frag_centroid, x) for x in label_coord])
-            mol_name = labels[closest]
+            mol_name = labels[closest[nf]]
 
         mol = Molecule(mol_name, atoms=atoms, bonds=bonds, geom=CartesianGeometry(geom))
         mol.fix_geom()
@@ -1,10 +1,27 @@
 import pandas as pd
+import re
+import io
+from typing import List, Union
 
-def get_xtbout_name(filestr: str):
+def _lines(filestr: Union[str, List[str]]):
 	"""
-	Take xtb output file string and extract name
+	Helpers below accept either the output string or its lines (filestr.split('\\n')), so that the split can be shared
 	"""
-	lines = filestr.split('\n')
+	return filestr.split('\n') if isinstance(filestr, str) else filestr
+
+def _read_table(section: List[str], usecols: List[int]):
+	"""
+	Whitespace aligned table (lines of an output section) -> DataFrame of strings with columns `usecols`
+	All tokenizing is done by the C parser of pandas
+	"""
+	return pd.read_csv(io.StringIO('\n'.join(section)), sep=r'\s+', header=None, usecols=usecols, dtype=str, engine='c')
+
+def get_xtbout_name(filestr: Union[str, List[str]]):
+	"""
+	Take xtb output file string (or its lines) and extract name
+	"""
+	# only lines 60..120 are searched, so there is no need to split the whole string
+	lines = filestr.split('\n', 120) if isinstance(filestr, str) else filestr
 	name_=''
 	for line in lines[60:120]:
 		if "coordinate file" in line:
@@ -13,6 +30,17 @@ def get_xtbout_name(filestr: str):
 		else: pass
 	raise Exception("Didn't find coordinate file line in output file!")
 	
+# section markers of xtb output -> (bound, line offset of the bound relative to the marker line)
+_SECTION_MARKERS = {
+	'Mol. C6AA': ('end_pd', -2),
+	'covCN': ('start_pd', 1), #Dispersion and polarizability
+	'Topologies differ': ('end_wib', -3),
+	'Z sym  total': ('start_wib', 2),
+	'f(+)': ('fukui_start', 1),
+	'Property Printout': ('fukui_end', -2),
+}
+_SECTION_RE = re.compile('|'.join(map(re.escape, _SECTION_MARKERS)))
+
 def get_xtbout_sections(filestr):
 	"""
 	gives tuples with start,stop line indices for sections of output files
@@ -22,35 +50,21 @@ def get_xtbout_sections(filestr):
 	'wiberg' for wiberg/mayer AO bond orders for each atom
 	'fukui' for condensed fukui coef. for each atom
 	"""
-	lines = filestr.split('\n')
-	start_pd = None #Dispersion and polarizability
-	end_pd = None
-	end_wib = None
-	start_wib = None
-	fukui_start = None
-	fukui_end = None
-	count = len(lines) #This is sloppy but will work for now. Fix later.
-	for line in lines[::-1]:
-		count -= 1 #Corrects for zero indexing, and only has to be performed at the top of the for loop, not after each condition
-		idx = count
-		if 'Mol. C6AA' in line:
-			end_pd = idx-2
-		elif 'covCN' in line:
-			start_pd = idx+1
-		elif 'Topologies differ' in line:
-			end_wib = idx-3
-		elif 'Z sym  total' in line:
-			start_wib = idx+2
-		elif 'f(+)' in line:
-			fukui_start = idx+1
-			break
-		elif 'Property Printout' in line:
-			fukui_end = idx-2
-		elif '(HOMO)' in line:
-			homoline = line
-		elif '(LUMO)' in line:
-			lumoline = line
-		else: pass
+	# Sections are located from the last fukui header onwards, the first occurrence of every marker counts.
+	# All markers are found in one regex scan; line indices are obtained by counting newlines up to the match
+	pos = filestr.rfind('f(+)')
+	pos = 0 if pos < 0 else filestr.rfind('\n', 0, pos) + 1
+	idx = filestr.count('\n', 0, pos)
+	bounds = {}
+	for m in _SECTION_RE.finditer(filestr, pos):
+		key, offset = _SECTION_MARKERS[m.group()]
+		if key not in bounds:
+			idx += filestr.count('\n', pos, m.start())
+			pos = m.start()
+			bounds[key] = idx + offset
+	start_pd, end_pd, start_wib, end_wib, fukui_start, fukui_end = map(
+		bounds.get, ('start_pd', 'end_pd', 'start_wib', 'end_wib', 'fukui_start', 'fukui_end')
+	)
 	outdict = {
 		'coeff':(start_pd,end_pd),
 		'wiberg':(start_wib,end_wib),
@@ -62,62 +76,59 @@ def get_xtbout_sections(filestr):
 		raise Exception('Did not find one of the bounds in file!')
 	return outdict
 
-def get_xtb_coef(filestr: str,outdict: dict):
+def get_xtb_coef(filestr: Union[str, List[str]],outdict: dict):
 	"""
 	This is meant to operate with dictionary of file sections from 
 	get_xtbout_sections()
 	"""
-	lines = filestr.split('\n')
+	lines = _lines(filestr)
 	st,end = outdict['coeff']
 	end+=1
 	# print(outdict['coeff'])
 	# print(st,end,type(st),type(end))
 	# print(lines)
 	section = lines[st:end]
-	outdict = {}
-	for line in section:
-		split = line.strip().split()
-		outdict[int(split[0])] = {'symbol':split[2],'disp':split[5],'pol':split[6],'charge':split[4],'covCN':split[3]}
-	df = pd.DataFrame.from_dict(outdict,orient='index')
+	t = _read_table(section, [0, 2, 3, 4, 5, 6])
+	df = pd.DataFrame({'symbol':t[2],'disp':t[5],'pol':t[6],'charge':t[4],'covCN':t[3]})
+	df.index = t[0].astype(int).to_numpy()
 	return df
 
-def get_xtb_fukui(filestr: str,outdict: dict):
+def get_xtb_fukui(filestr: Union[str, List[str]],outdict: dict):
 	"""
 	This pulls out fukui incices and writes them to a dataframe
 	"""
-	lines = filestr.split('\n')
+	lines = _lines(filestr)
 	st,end = outdict['fukui']
 	end+=1
 	# print(outdict['coeff'])
 	# print(st,end,type(st),type(end))
 	# print(lines)
 	section = lines[st:end]
-	outdict = {}
-	for line in section:
-		split = line.strip().split()
-		atomid = int(''.join([f for f in split[0] if f.isdigit()]))
-		outdict[atomid] = {'f+':split[1],'f-':split[2],'f0':split[3]}
-	df = pd.DataFrame.from_dict(outdict,orient='index')
+	t = _read_table(section, [0, 1, 2, 3])
+	df = pd.DataFrame({'f+':t[1],'f-':t[2],'f0':t[3]})
+	# first column is atom number + symbol (e.g. 12C)
+	df.index = t[0].str.replace(r'\D', '', regex=True).astype(int).to_numpy()
 	return df
 
-def get_xtb_wiberg(filestr: str,outdict: dict):
+def get_xtb_wiberg(filestr: Union[str, List[str]],outdict: dict):
 	"""
 	Get MAX wiberg bond order for each atom
 	"""
-	lines = filestr.split('\n')
+	lines = _lines(filestr)
 	st,end = outdict['wiberg']
 	end+=1
 	# print(outdict['coeff'])
 	# print(st,end,type(st),type(end))
 	# print(lines)
 	section = lines[st:end]
-	outdict = {}
+	idx, bo = [], []
 	for line in section:
-		split = line.strip().split()
+		split = line.split()
 		if len(split) == 3 or len(split) == 6: continue
 		else:
-			outdict[int(split[0])] = {'max_bond_order':split[7]}
-	df = pd.DataFrame.from_dict(outdict,orient='index')
+			idx.append(int(split[0]))
+			bo.append(split[7])
+	df = pd.DataFrame({'max_bond_order':bo},index=idx)
 	return df
 
 def extract_xtb_atomic_properties(xtbout: str,xtb_coef = True,fukui = True,wiberg=True):
@@ -133,17 +144,19 @@ def extract_xtb_atomic_properties(xtbout: str,xtb_coef = True,fukui = True,wiber
 	# 	filestr = g.read().decode('utf-8')
 	filestr = xtbout
 	sections = get_xtbout_sections(filestr)
+	# the output is split into lines once for all section parsers
+	lines = filestr.split('\n')
 	out = []
 	if xtb_coef == True: 
-		df1 = get_xtb_coef(filestr,sections)
+		df1 = get_xtb_coef(lines,sections)
 		out.append(df1)
 	if fukui == True: 
-		df2 = get_xtb_fukui(filestr,sections)
+		df2 = get_xtb_fukui(lines,sections)
 		out.append(df2)
 	if wiberg == True: 
-		df3 = get_xtb_wiberg(filestr,sections)
+		df3 = get_xtb_wiberg(lines,sections)
 		out.append(df3)
 	outdf = pd.concat(out,axis=1)
-	name = get_xtbout_name(filestr)
+	name = get_xtbout_name(lines)
 	outdf.name = name
 	return outdf
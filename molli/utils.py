@@ -2,6 +2,7 @@
     Miscellaneous useful utilities.
 """
 import colorama
+import sys
 from datetime import datetime
 
 
@@ -16,16 +17,21 @@ class ForeColor:
         "default": colorama.Fore.WHITE,
     }
 
+    # color codes are only written to an interactive terminal (not into pipes and log files)
+    ENABLED = bool(getattr(sys.stdout, "isatty", None) and sys.stdout.isatty())
+
     def __init__(self, color: str = "default"):
         self.color = color.lower()
 
     def __enter__(self):
         c = self.__class__.COLORS[self.color]
-        print(c, end="")
+        if self.__class__.ENABLED:
+            sys.stdout.write(c)
         # return self
 
     def __exit__(self, *args):
-        print(colorama.Style.RESET_ALL, end="")
+        if self.__class__.ENABLED:
+            sys.stdout.write(colorama.Style.RESET_ALL)
 
 
 class WCTimer:
@@ -4,42 +4,72 @@
 
 import molli as ml
 from glob import glob
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
+import os
+import logging
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# for larger inputs per-file lines are only logged at DEBUG level, a progress summary is logged every PROGRESS_EVERY files instead
+VERBOSE_MAX = 10000
+PROGRESS_EVERY = 1000
+
+
+def _load(f: str):
+    """
+    Worker: (file, molecule) or (file, None) if the file could not be read
+    """
+    try:
+        return f, ml.Molecule.from_xml(f)
+    except:
+        return f, None
+
 
 def main(argv: list):
 
-    print("=== Compiling molecules ===")
+    log.info("=== Compiling molecules ===")
 
-    print("Locating input files ...")
+    log.info("Locating input files ...")
 
     if len(argv) > 2:
-        print(f"\t... found {len(argv[1:])} input files. Using those.")
+        log.info("\t... found %d input files. Using those.", len(argv[1:]))
         mfs = argv
     else:
         mfs = glob(argv[1])
-        print(f"\t... found one expression matching {len(mfs)} files.")
+        log.info("\t... found one expression matching %d files.", len(mfs))
 
-    print(f"Searching for unique molecule containers")
+    log.info("Searching for unique molecule containers")
 
     molecules = dict()
 
-    for f in mfs:
-        try:
-            m = ml.Molecule.from_xml(f)
-        except:
-            print(f"[!f] {f}", flush=True)
-        else:
-            if m.name not in molecules:
-                molecules[m.name] = m
-                print(f"[+m] {len(m.conformers):>5} {m.name}", flush=True)
-            elif m.name in molecules and len(molecules[m.name].conformers) < len(m.conformers):
-                molecules[m.name] = m
-                print(f"[*m] {len(m.conformers):>5} {m.name}", flush=True)
-    
-    print(f"Found {len(molecules)} unique molecules.")
-    
-    _mols = [molecules[x] for x in molecules]
+    # files are parsed in worker processes; map keeps the input order, so the deduplication below is not affected
+    cs = max(1, len(mfs) // ((os.cpu_count() or 1) * 4))
+
+    # number of conformers of the molecules kept so far
+    counts = dict()
+
+    per_file = logging.INFO if len(mfs) <= VERBOSE_MAX else logging.DEBUG
 
-    _mols.sort(key = lambda x: x.name) 
+    with ProcessPoolExecutor() as ex:
+        for i, (f, m) in enumerate(ex.map(_load, mfs, chunksize=cs), 1):
+            if m is None:
+                log.warning("[!f] %s", f)
+            else:
+                new_n = len(m.conformers)
+                old_n = counts.get(m.name, -1)
+                if new_n > old_n:
+                    molecules[m.name] = m
+                    counts[m.name] = new_n
+                    log.log(per_file, "[%sm] %5d %s", "+" if old_n < 0 else "*", new_n, m.name)
+
+            if per_file == logging.DEBUG and not i % PROGRESS_EVERY:
+                log.info("\t... %d / %d files, %d unique molecules", i, len(mfs), len(molecules))
+
+    log.info("Found %d unique molecules.", len(molecules))
+    
+    _mols = sorted(molecules.values(), key=attrgetter("name"))
 
     mols = ml.Collection("compilation", _mols)
 
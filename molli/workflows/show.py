@@ -50,7 +50,8 @@ def main(argv):
         c = ml.Collection.from_zip(parsed.zipfile)
         c: ml.Collection
         with NamedTemporaryFile("w+t", dir=".", suffix=".xyz") as f:
-            f.write(c.to_multixyz())
+            c.write_multixyz(f)
+            f.flush()
             run([parsed.command, f.name], stderr=DEVNULL, stdout=DEVNULL)
     
     elif parsed.show_conformers:
@@ -58,11 +59,11 @@ def main(argv):
         with c, NamedTemporaryFile("w+t", dir=".", suffix=".mol2") as tf:
             m = c[parsed.show_conformers]
 
-            allconfs = m.confs_to_molecules()
-            for x in allconfs:
-                tf.write(x.to_mol2())
+            for block in m.yield_confs_mol2():
+                tf.write(block)
                 tf.write("\n")
-            
+            tf.flush()
+
             run([parsed.command, tf.name], stderr=DEVNULL, stdout=DEVNULL)
     
     elif parsed.show_subset:
@@ -75,5 +76,6 @@ def main(argv):
                     nn = l.strip()            
                     tf.write(c[nn].to_mol2())
                     tf.write("\n")
-            
+            tf.flush()
+
             run([parsed.command, tf.name], stderr=DEVNULL, stdout=DEVNULL)
\ No newline at end of file
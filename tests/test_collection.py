@@ -0,0 +1,95 @@
+import pytest
+import numpy as np
+import molli as ml
+from molli.dtypes import Atom, Bond, CartesianGeometry
+
+
+def _collection(n):
+    mols = []
+    for i in range(n):
+        atoms = [Atom("C", "C1", "C.3"), Atom("H", "H2", "H")]
+        geom = CartesianGeometry(np.array([[0.0, 0.0, 0.0], [1.1, 0.0, 0.0]]))
+        mols.append(ml.Molecule(f"m{i}", atoms=atoms, bonds=[Bond(*atoms, "1")], geom=geom))
+    return ml.Collection("c", mols)
+
+
+def _name(m):
+    return m.name
+
+
+def test_applyfx_probe_results_kept(monkeypatch):
+    # serial fallback after the timing probe: every molecule is processed exactly once
+    c = _collection(40)
+    calls = []
+
+    def fx(m):
+        calls.append(m.name)
+        return m.name
+
+    monkeypatch.setattr(ml.Collection, "SERIAL_TIME", 1e6)
+    res = c.applyfx(fx)(workers=2, show_progress=False)
+    assert res == [m.name for m in c]
+    assert calls == res
+
+
+def test_applyfx_pool_order(monkeypatch):
+    c = _collection(40)
+    monkeypatch.setattr(ml.Collection, "SERIAL_TIME", 0.0)
+    monkeypatch.setattr(ml.Collection, "PROBE_SIZE", 3)
+    res = c.applyfx(_name)(workers=2, show_progress=False)
+    assert res == [m.name for m in c]
+
+
+def test_applyfx_few_expensive_molecules_use_pool(monkeypatch):
+    # the decision to go serial depends on the estimated duration, not on the number of molecules
+    c = _collection(4)
+    monkeypatch.setattr(ml.Collection, "SERIAL_TIME", 0.0)
+    monkeypatch.setattr(ml.Collection, "PROBE_SIZE", 1)
+    calls = []
+
+    def fx(m):
+        calls.append(m.name)
+        return m.name
+
+    monkeypatch.setattr("molli.dtypes.collection.Pool", _FakePool)
+    res = c.applyfx(fx)(workers=4, show_progress=False)
+    assert res == [m.name for m in c]
+    assert calls == ["m0", "m1", "m2", "m3"]
+    assert _FakePool.used
+
+
+class _FakePool:
+    used = False
+
+    def __init__(self, workers):
+        type(self).used = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def imap_unordered(self, f, it, chunksize=1):
+        return map(f, it)
+
+
+def test_replace_then_lookup():
+    c = _collection(5)
+    new = _collection(1)[0]
+    new.name = "new"
+
+    c[1] = new
+    assert c["new"] is new
+    assert c.mol_index[1] == "new"
+    with pytest.raises(KeyError):
+        c["m1"]
+
+    c["new"] = c[3]
+    assert c["m3"] is c.molecules[1]
+
+    # direct modification of the molecule list
+    m4 = c.molecules.pop(4)
+    c.molecules.insert(0, m4)
+    assert c["m4"] is m4
+    assert c["m0"] is c.molecules[1]
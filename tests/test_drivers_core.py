@@ -0,0 +1,58 @@
+import asyncio as aio
+import os
+import time
+
+import pytest
+from molli.drivers._core import AsyncExternalDriver
+
+
+def _alive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # zombies are dead already, they just have not been reaped
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_cancel_kills_job_processes(tmp_path):
+    drv = AsyncExternalDriver(scratch_dir=str(tmp_path / "scratch"))
+    pidfile = tmp_path / "pid"
+
+    async def main():
+        # the sleep is a child of the job shell, as xtb would be
+        task = aio.ensure_future(drv.aexec(f"sleep 30 & echo $! > {pidfile}; wait"))
+        for _ in range(100):
+            await aio.sleep(0.05)
+            if pidfile.exists() and pidfile.read_text().strip():
+                break
+        task.cancel()
+        with pytest.raises(aio.CancelledError):
+            await task
+
+    aio.run(main())
+
+    pid = int(pidfile.read_text())
+    for _ in range(50):
+        if not _alive(pid):
+            break
+        time.sleep(0.05)
+    assert not _alive(pid)
+
+
+def test_gather_jobs_cancels_remaining(tmp_path):
+    drv = AsyncExternalDriver(scratch_dir=str(tmp_path / "scratch"))
+    pidfile = tmp_path / "pid"
+
+    async def fail():
+        await aio.sleep(0.5)
+        raise RuntimeError("job failed")
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await drv.gather_jobs(drv.aexec(f"echo $$ > {pidfile}; exec sleep 30"), fail())
+
+    t0 = time.perf_counter()
+    aio.run(main())
+    assert time.perf_counter() - t0 < 10
+    assert not _alive(int(pidfile.read_text()))
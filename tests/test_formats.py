@@ -0,0 +1,198 @@
+import io
+
+import numpy as np
+import pytest
+import molli as ml
+from molli.dtypes import Atom, Bond, CartesianGeometry
+from molli.dtypes.molecule import (
+    _read_chunks,
+    _xml_events,
+    get_mol2_block_lines,
+    read_mol2_sections,
+    split_mol2_sections,
+)
+from molli.ftypes import parse_xyz
+from molli.ftypes.xyz import read_last_xyz_block
+
+# Reference output of the original minidom / string concatenation writers for `_molecule()`
+XML = (
+    '<?xml version="1.0" ?>\n'
+    '<!--MOLLI PACKAGE EXPERIMENTAL XML FORMAT-->\n'
+    '<molecule name="frag &quot;a&quot;">\n'
+    '\t<atoms>\n'
+    '\t\t<a id="1" s="C" t="C.3" l="C1"/>\n'
+    '\t\t<a id="2" s="O" t="O.3" l="O&lt;2&gt;"/>\n'
+    '\t\t<a id="3" s="H" t="H" l="H&amp;3"/>\n'
+    '\t</atoms>\n'
+    '\t<bonds>\n'
+    '\t\t<b id="1" c="1 2" t="1"/>\n'
+    '\t\t<b id="2" c="2 3" t="ar"/>\n'
+    '\t</bonds>\n'
+    '\t<geometry>\n'
+    '\t\t<g u="A" t="cart/3d">#3,3:0.0000,0.0000,0.0000;1.4000,0.0000,0.0000;1.8000,0.9000,-0.2500;</g>\n'
+    '\t</geometry>\n'
+    '\t<conformers>\n'
+    '\t\t<g id="1" u="A" t="cart/3d">#3,3:0.1000,0.1000,0.1000;1.5000,0.1000,0.1000;1.9000,1.0000,-0.1500;</g>\n'
+    '\t\t<g id="2" u="A" t="cart/3d">#3,3:0.2000,0.2000,0.2000;1.6000,0.2000,0.2000;2.0000,1.1000,-0.0500;</g>\n'
+    '\t</conformers>\n'
+    '\t<properties/>\n'
+    '</molecule>\n'
+)
+
+XML_FLAT = (
+    '<?xml version="1.0" ?><!--MOLLI PACKAGE EXPERIMENTAL XML FORMAT--><molecule name="frag &quot;a&quot;"><atoms><a id="1" s="C" t="C.3" l="C1"/><a id="2" s="O" t="O.3" l="O&lt;2&gt;"/><a id="3" s="H" t="H" l="H&amp;3"/></atoms><bonds><b id="1" c="1 2" t="1"/><b id="2" c="2 3" t="ar"/></bonds><geometry><g u="A" t="cart/3d">#3,3:0.0000,0.0000,0.0000;1.4000,0.0000,0.0000;1.8000,0.9000,-0.2500;</g></geometry><conformers><g id="1" u="A" t="cart/3d">#3,3:0.1000,0.1000,0.1000;1.5000,0.1000,0.1000;1.9000,1.0000,-0.1500;</g><g id="2" u="A" t="cart/3d">#3,3:0.2000,0.2000,0.2000;1.6000,0.2000,0.2000;2.0000,1.1000,-0.0500;</g></conformers><properties/></molecule>'
+)
+
+MOL2 = (
+    '@<TRIPOS>MOLECULE\n'
+    'frag "a"\n'
+    '3 2 0 0 0\n'
+    'SMALL\n'
+    'GASTEIGER\n'
+    '\n'
+    '@<TRIPOS>ATOM\n'
+    '     1 C1      0.0000     0.0000     0.0000 C.3        1 UNL1 0.0\n'
+    '     2 O<2>     1.4000     0.0000     0.0000 O.3        1 UNL1 0.0\n'
+    '     3 H&3     1.8000     0.9000    -0.2500 H          1 UNL1 0.0\n'
+    '@<TRIPOS>BOND\n'
+    '     1      1      2          1\n'
+    '     2      2      3         ar\n'
+    '\n'
+)
+
+
+def _molecule():
+    # names and labels with characters that must be escaped in xml
+    atoms = [Atom("C", "C1", "C.3"), Atom("O", "O<2>", "O.3"), Atom("H", "H&3", "H")]
+    bonds = [Bond(atoms[0], atoms[1], "1"), Bond(atoms[1], atoms[2], "ar")]
+    geom = CartesianGeometry(np.array([[0.0, 0.0, 0.0], [1.4, 0.0, 0.0], [1.8, 0.9, -0.25]]))
+    confs = [CartesianGeometry(geom.coord + 0.1 * (k + 1)) for k in range(2)]
+    return ml.Molecule('frag "a"', atoms=atoms, bonds=bonds, geom=geom, conformers=confs)
+
+
+def _same_molecule(m1, m2):
+    assert m1.name == m2.name
+    assert [(a.symbol, a.label, a.atom_type) for a in m1.atoms] == [
+        (a.symbol, a.label, a.atom_type) for a in m2.atoms
+    ]
+    assert [(m1.atoms.index(b.a1), m1.atoms.index(b.a2), b.bond_type) for b in m1.bonds] == [
+        (m2.atoms.index(b.a1), m2.atoms.index(b.a2), b.bond_type) for b in m2.bonds
+    ]
+    np.testing.assert_allclose(m1.geom.coord, m2.geom.coord, atol=1e-4)
+    assert len(m1.conformers) == len(m2.conformers)
+    for c1, c2 in zip(m1.conformers, m2.conformers):
+        np.testing.assert_allclose(c1.coord, c2.coord, atol=1e-4)
+
+
+def test_xml_writer_matches_reference():
+    m = _molecule()
+    assert m.to_xml() == XML
+    assert m.to_xml(pretty=False) == XML_FLAT
+    assert "".join(m._xml_chunks()) == XML
+
+    text, binary = io.StringIO(), io.BytesIO()
+    m.write_xml(text)
+    m.write_xml(binary)
+    assert text.getvalue() == XML
+    assert binary.getvalue() == XML.encode()
+
+
+@pytest.mark.parametrize("xml", [XML, XML_FLAT])
+def test_xml_round_trip(tmp_path, xml):
+    m = _molecule()
+    fn = tmp_path / "m.xml"
+    fn.write_text(xml)
+
+    parsed = [
+        ml.Molecule.from_xml(fn),
+        ml.Molecule.from_xml_bytes(xml.encode()),
+        ml.Molecule.from_xml_bytes(xml),
+    ]
+    # tiny chunks: elements are split across the chunks fed to the pull parser
+    with open(fn, "rb") as f:
+        parsed.append(ml.Molecule._from_xml_events(_xml_events(_read_chunks(f, 7))))
+
+    for m2 in parsed:
+        _same_molecule(m, m2)
+        assert m2.to_xml() == XML
+
+
+def test_mol2_writer_matches_reference(tmp_path):
+    m = _molecule()
+    assert m.to_mol2() == MOL2
+
+    # conformer export formats the topology once, the output is the same as for separate molecules
+    expected = [c.to_mol2() for c in m.confs_to_molecules()]
+    assert list(m.yield_confs_mol2()) == expected
+
+    m.confs_to_mol2_files(str(tmp_path), nprocs=1)
+    for c, mol2 in zip(m.confs_to_molecules(), expected):
+        assert (tmp_path / f"{c.name}.mol2").read_text() == mol2
+
+
+def test_mol2_round_trip():
+    m = _molecule()
+    m2 = ml.Molecule.from_mol2(MOL2)
+    m.conformers = []
+    _same_molecule(m, m2)
+    assert m2.to_mol2() == MOL2
+
+    with io.BytesIO(MOL2.encode()) as f:
+        assert ml.Molecule.from_mol2(io.TextIOWrapper(f)).to_mol2() == MOL2
+
+
+def test_mol2_sections_match_block_lines():
+    text = (
+        "# comment\n"
+        "@<TRIPOS>MOLECULE\n"
+        "  name  \n"
+        "\n"
+        "1 0 0 0 0\n"
+        "@<TRIPOS>ATOM\n"
+        "      1 C1   0.0 0.0 0.0 C.3  1 UNL1 0.0\n"
+        "@<TRIPOS>UNITY_ATOM_ATTR\n"
+        "1 1\n"
+        "@<TRIPOS>BOND\n"
+        "@<TRIPOS>ATOM\n"
+        "      9 X9   9.0 9.0 9.0 X    1 UNL1 0.0\n"
+    )
+    sections = split_mol2_sections(text)
+    for title in ("MOLECULE", "ATOM", "UNITY_ATOM_ATTR", "BOND"):
+        assert sections[title] == get_mol2_block_lines(title, text)
+
+    assert read_mol2_sections(l.encode() for l in text.splitlines(True)) == sections
+
+
+def _ensemble(n_frames=3, natoms=4):
+    frames = []
+    for k in range(n_frames):
+        lines = [f"{natoms}", f" energy: {-1.5 * k:.6f} gnorm: 0.1"]
+        lines += [f"C {k + i:12.6f} {0.5 * i:12.6f} {-0.25 * k:12.6f}" for i in range(natoms)]
+        frames.append("\n".join(lines) + "\n")
+    return frames
+
+
+def test_xyz_ensemble_matches_parse_xyz():
+    frames = _ensemble()
+    text = "".join(frames)
+    ref = np.array([coord for coord, _, _ in parse_xyz(text, single=False)])
+
+    ens = CartesianGeometry.from_xyz_ensemble(text, 4)
+    assert ens.shape == (3, 4, 3)
+    np.testing.assert_allclose(ens, ref, atol=1e-6)
+
+    with pytest.raises(SyntaxError):
+        CartesianGeometry.from_xyz_ensemble(text, 5)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 65536])
+def test_read_last_xyz_block(tmp_path, chunk_size):
+    frames = _ensemble(n_frames=20)
+    fn = tmp_path / "xtbopt.log"
+    fn.write_text("".join(frames))
+
+    assert read_last_xyz_block(str(fn), chunk_size=chunk_size) == frames[-1]
+
+    fn.write_text("garbage\n")
+    with pytest.raises(SyntaxError):
+        read_last_xyz_block(str(fn), chunk_size=chunk_size)
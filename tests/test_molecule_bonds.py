@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+import molli as ml
+from molli.dtypes import Atom, Bond, CartesianGeometry
+
+
+def _chain(n=4):
+    atoms = [Atom("C", f"C{i + 1}", "C.3") for i in range(n)]
+    bonds = [Bond(atoms[i], atoms[i + 1], "1") for i in range(n - 1)]
+    geom = CartesianGeometry(np.array([[1.5 * i, 0.0, 0.0] for i in range(n)]))
+    return ml.Molecule("chain", atoms=atoms, bonds=bonds, geom=geom)
+
+
+def _brute_connected(m, a):
+    return {b.a2 if b.a1 is a else b.a1 for b in m.bonds if a in (b.a1, b.a2)}
+
+
+def test_in_place_bond_replacement():
+    m = _chain()
+    c1, c2, c3, c4 = m.atoms
+    assert m.get_connected_atoms(c1) == {c2}
+
+    # same number of bonds, different connectivity
+    m.bonds[0] = Bond(c1, c3, "1")
+    for a in m.atoms:
+        assert m.get_connected_atoms(a) == _brute_connected(m, a)
+    assert m.get_connected_atoms(c1) == {c3}
+
+
+def test_bond_mutations_keep_adjacency_current():
+    m = _chain(5)
+    c1, c2, c3, c4, c5 = m.atoms
+    m.get_connected_atoms(c1)
+
+    m.add_bond(c1, c5)
+    m.bonds.sort(key=lambda b: b.a1.label, reverse=True)
+    m.bonds.pop()
+    for a in m.atoms:
+        assert m.get_connected_atoms(a) == _brute_connected(m, a)
+
+    m.remove_atoms(c3)
+    for a in m.atoms:
+        assert m.get_connected_atoms(a) == _brute_connected(m, a)
+    assert m.get_connected_atoms(c4) == {c5}
+
+    # a plain list assigned from the outside is not tracked, and is read as is
+    m.bonds = [Bond(c1, c2, "1")]
+    assert m.get_connected_atoms(c1) == {c2}
+    m.bonds.append(Bond(c1, c4, "1"))
+    assert m.get_connected_atoms(c1) == {c2, c4}
+
+
+def test_atom_index_follows_atom_list():
+    m = _chain()
+    c1, c2, c3, c4 = m.atoms
+    assert [m.get_atom_idx(a) for a in m.atoms] == [0, 1, 2, 3]
+
+    # the cached map is checked against the atom list on every lookup
+    m.atoms.reverse()
+    assert [m.get_atom_idx(a) for a in (c1, c2, c3, c4)] == [3, 2, 1, 0]
+
+    m.remove_atoms(c2)
+    assert [m.get_atom_idx(a) for a in (c1, c3, c4)] == [2, 1, 0]
+    with pytest.raises(ValueError):
+        m.get_atom_idx(c2)
+    assert m.get_atom_idx("C3") == 1
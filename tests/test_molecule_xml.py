@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import numpy as np
+import molli as ml
+from molli.dtypes import Atom, Bond, CartesianGeometry
+
+
+def _molecule():
+    atoms = [Atom("C", "C1", "C.3"), Atom("O", "O2", "O.3"), Atom("H", "H3", "H")]
+    bonds = [Bond(atoms[0], atoms[1], "1"), Bond(atoms[1], atoms[2], "1")]
+    geom = CartesianGeometry(np.array([[0.0, 0.0, 0.0], [1.4, 0.0, 0.0], [1.8, 0.9, 0.0]]))
+    return ml.Molecule("methanol_frag", atoms=atoms, bonds=bonds, geom=geom)
+
+
+def test_from_xml_path_and_str(tmp_path):
+    m = _molecule()
+    fn = tmp_path / "m.xml"
+    fn.write_text(m.to_xml())
+
+    for fp in (fn, str(fn)):
+        assert isinstance(fp, (str, Path))
+        m2 = ml.Molecule.from_xml(fp)
+        assert m2.name == m.name
+        assert [a.label for a in m2.atoms] == [a.label for a in m.atoms]
+        assert len(m2.bonds) == len(m.bonds)
+        np.testing.assert_allclose(m2.geom.coord, m.geom.coord, atol=1e-4)
+
+
+def test_from_xml_file_object(tmp_path):
+    m = _molecule()
+    fn = tmp_path / "m.xml"
+    fn.write_text(m.to_xml())
+
+    with open(fn, "rb") as f:
+        m2 = ml.Molecule.from_xml(f)
+
+    assert m2.to_xml() == ml.Molecule.from_xml(fn).to_xml()
@@ -0,0 +1,36 @@
+import asyncio as aio
+import os
+
+import pytest
+from molli.drivers.obabel import AsyncOpenBabelDriver
+
+# stands in for obabel: echoes its input, unless told to fail or to stay silent
+FAKE_OBABEL = """#!/bin/sh
+case "$FAKE_OBABEL_MODE" in
+    fail) cat; echo "0 molecules converted" >&2; exit 1 ;;
+    empty) cat > /dev/null; exit 0 ;;
+    *) cat ;;
+esac
+"""
+
+
+@pytest.fixture
+def drv(tmp_path, monkeypatch):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    exe = bindir / "obabel"
+    exe.write_text(FAKE_OBABEL)
+    exe.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+    return AsyncOpenBabelDriver(scratch_dir=str(tmp_path / "scratch"))
+
+
+def test_convert_returns_stdout(drv):
+    assert aio.run(drv.convert("mol text\n", src="mol2", dest="mol2")) == "mol text\n"
+
+
+@pytest.mark.parametrize("mode", ["fail", "empty"])
+def test_convert_failure_raises(drv, monkeypatch, mode):
+    monkeypatch.setenv("FAKE_OBABEL_MODE", mode)
+    with pytest.raises(RuntimeError):
+        aio.run(drv.convert("mol text\n", src="mol2", dest="mol2"))
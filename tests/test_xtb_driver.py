@@ -0,0 +1,75 @@
+import asyncio as aio
+import os
+import pickle
+
+import pytest
+from molli.drivers.xtb import AsyncXTBDriver
+
+# stands in for xtb: records its arguments and the files it was given, and "optimizes" by copying the input
+FAKE_XTB = """#!/bin/sh
+echo "$@" > "$FAKE_XTB_LOG"
+ls >> "$FAKE_XTB_LOG"
+cp "$1" xtbopt.xyz
+"""
+
+XYZ = "2\n\nH 0.0 0.0 0.0\nH 0.0 0.0 0.74\n"
+
+
+def test_jobdirs_unique_across_copies(tmp_path):
+    drv = AsyncXTBDriver(scratch_dir=str(tmp_path / "scratch"))
+    copy = pickle.loads(pickle.dumps(drv))
+
+    with drv.jobdir() as d1, copy.jobdir() as d2, drv.jobdir() as d3:
+        assert len({d1, d2, d3}) == 3
+        assert all(os.path.dirname(d) == drv._scratch for d in (d1, d2, d3))
+
+
+def test_scratch_removed_by_creator_only(tmp_path):
+    drv = AsyncXTBDriver(scratch_dir=str(tmp_path / "scratch"))
+
+    pid = os.fork()
+    if pid == 0:
+        # a forked worker running the exit handler must not remove the shared job root
+        drv._remove_scratch()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.path.isdir(drv._scratch)
+
+    drv._remove_scratch()
+    assert not os.path.exists(drv._scratch)
+
+
+@pytest.fixture
+def fake_xtb(tmp_path, monkeypatch):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    exe = bindir / "xtb"
+    exe.write_text(FAKE_XTB)
+    exe.chmod(0o755)
+    log = tmp_path / "xtb.log"
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_XTB_LOG", str(log))
+    return log
+
+
+@pytest.mark.parametrize("xtbinp", ["", "$fix\n  atoms: 1\n$end\n"])
+def test_xyz_optimize_command_line(tmp_path, fake_xtb, xtbinp):
+    drv = AsyncXTBDriver(scratch_dir=str(tmp_path / "scratch"), nprocs=2)
+    res = aio.run(drv.xyz_optimize(XYZ, method="gfn2", crit="tight", xtbinp=xtbinp, maxiter=7, xyz_name="h2"))
+    assert res == XYZ
+
+    args, *files = fake_xtb.read_text().split("\n")
+    expected = "h2.xyz --gfn2 --opt tight --cycles 7"
+    if xtbinp:
+        expected += " --input param.inp"
+    assert args == expected + " -P 2"
+    assert ("param.inp" in files) == bool(xtbinp)
+
+
+def test_xtb_calls_logged_at_debug(tmp_path, fake_xtb, caplog, capsys):
+    drv = AsyncXTBDriver(scratch_dir=str(tmp_path / "scratch"))
+    with caplog.at_level("DEBUG", logger="molli.drivers.xtb"):
+        aio.run(drv.xyz_optimize(XYZ, xyz_name="h2"))
+
+    assert any(r.levelname == "DEBUG" and "xtb h2.xyz" in r.getMessage() for r in caplog.records)
+    assert capsys.readouterr().out == ""
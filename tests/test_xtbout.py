@@ -0,0 +1,81 @@
+import pytest
+from molli.parsing.xtbout import (
+    extract_xtb_atomic_properties,
+    get_xtbout_name,
+    get_xtbout_sections,
+)
+
+
+def _xtbout(n=4):
+    lines = [f"   header line {i}" for i in range(70)]
+    lines.append("          coordinate file            : struct.xyz")
+    lines += [f"   more header {i}  covCN  (early)" for i in range(5)]
+    lines += ["     #        f(+)     f(-)     f(0)   (early block)", "junk"]
+    lines.append("     #        f(+)     f(-)     f(0)")
+    for i in range(1, n + 1):
+        lines.append(f"     {i}{'CHNO'[i % 4]}      {0.1 * i:.3f}   {-0.05 * i:.3f}   {0.02 * i:.3f}")
+    lines += [
+        "           -------------------------------------------------",
+        "          |                Property Printout                |",
+        "           -------------------------------------------------",
+        "  some (HOMO) line",
+        "  some (LUMO) line",
+        "     #   Z          covCN         q      C6AA      α(0)",
+    ]
+    for i in range(1, n + 1):
+        lines.append(f"     {i}   6 C        {0.9 * i:.3f}    {-0.1 * i:.3f}    {10.5 + i:.3f}     {1.25 * i:.3f}")
+    lines += [
+        "",
+        "     Mol. C6AA /au·bohr⁶  :       1234.5",
+        "",
+        "Wiberg/Mayer (AO) data.",
+        " ---------------------------------------------------------------------------",
+        "     #   Z sym  total        # sym  WBO       # sym  WBO       # sym  WBO",
+        " ---------------------------------------------------------------------------",
+    ]
+    for i in range(1, n + 1):
+        lines.append(f"     {i}   6 C    3.986 --     2 C    {0.3 * i:.3f}     6 C    1.437     7 H    0.970")
+        if i % 2 == 0:
+            lines.append("                            8 H    0.970     9 H    0.970")
+    lines += [
+        " ---------------------------------------------------------------------------",
+        "",
+        "Topologies differ in total number of bonds",
+        "trailer",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# Results of the original line-by-line parsers for `_xtbout()`
+SECTIONS = {"coeff": (89, 92), "wiberg": (100, 105), "fukui": (79, 82)}
+PROPERTIES = {
+    "symbol": ["C", "C", "C", "C"],
+    "disp": ["11.500", "12.500", "13.500", "14.500"],
+    "pol": ["1.250", "2.500", "3.750", "5.000"],
+    "charge": ["-0.100", "-0.200", "-0.300", "-0.400"],
+    "covCN": ["0.900", "1.800", "2.700", "3.600"],
+    "f+": ["0.100", "0.200", "0.300", "0.400"],
+    "f-": ["-0.050", "-0.100", "-0.150", "-0.200"],
+    "f0": ["0.020", "0.040", "0.060", "0.080"],
+    "max_bond_order": ["0.300", "0.600", "0.900", "1.200"],
+}
+
+
+def test_sections_and_name():
+    out = _xtbout()
+    assert get_xtbout_sections(out) == SECTIONS
+    assert get_xtbout_name(out) == "struct"
+    assert get_xtbout_name(out.split("\n")) == "struct"
+
+
+def test_atomic_properties_match_reference():
+    df = extract_xtb_atomic_properties(_xtbout())
+    assert df.name == "struct"
+    assert list(df.index) == [1, 2, 3, 4]
+    assert {k: list(v) for k, v in df.to_dict("list").items()} == PROPERTIES
+
+
+def test_missing_section_raises():
+    out = _xtbout().replace("Topologies differ", "Topologies agree")
+    with pytest.raises(Exception, match="bounds"):
+        get_xtbout_sections(out)